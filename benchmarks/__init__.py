@@ -0,0 +1,6 @@
+"""
+Benchmarks of webel's page objects against a latency-simulating fake driver.
+
+Run with `python -m benchmarks.run`; see `benchmarks.run` for options.
+`python -m benchmarks.memory` measures the memory taken by element list rows.
+"""
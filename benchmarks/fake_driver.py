@@ -0,0 +1,291 @@
+"""
+An in-process WebDriver serving a synthetic DOM, with simulated latency.
+
+Every command goes through `FakeDriver.execute`, which counts it and sleeps
+for `latency` seconds plus up to `jitter` either way.  Scripts from
+`webel.scripts` are emulated by `webel.script_emulation`; any other script
+fails like it would on a driver without javascript, so webel falls back to
+plain commands.
+"""
+import random
+import re
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+from webel.script_emulation import ScriptEmulation
+
+
+class Node(object):
+
+    """An element of the synthetic DOM."""
+
+    def __init__(self, tag, children=(), text='', value=None, checked=False,
+                 displayed=True, href=None, **attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.text = text
+        self.value = value
+        self.checked = checked
+        self.displayed = displayed
+        self.href = href
+        self.parent = None
+        self.children = []
+        for child in children:
+            self.append(child)
+
+    def append(self, child):
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    def descendants(self):
+        for child in self.children:
+            yield child
+            for node in child.descendants():
+                yield node
+
+    def is_displayed(self):
+        node = self
+        while node is not None:
+            if not node.displayed:
+                return False
+            node = node.parent
+        return True
+
+    def visible_text(self):
+        if not self.is_displayed():
+            return ''
+        parts = [self.text] + [child.visible_text() for child in self.children]
+        return ' '.join(part for part in parts if part).strip()
+
+    def read(self, prop):
+        if prop == 'text':
+            return self.visible_text()
+        if prop == 'checked':
+            return self.checked
+        return self.value
+
+    def write(self, prop, value):
+        if prop == 'checked':
+            self.checked = value
+        else:
+            self.value = value
+
+
+_compound_re = re.compile(
+    r'(?P<tag>[\w-]+|\*)?(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[\w-]+(?:=[^\]]*)?\])*)$')
+_part_re = re.compile(r'#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:=([^\]]*))?\]')
+
+
+def _compile_compound(compound):
+    match = _compound_re.match(compound)
+    if match is None:
+        raise WebDriverException('Unsupported selector: %r' % compound)
+    tag = match.group('tag')
+    checks = []
+    if tag and tag != '*':
+        checks.append(lambda node: node.tag == tag)
+    for id_, class_, attr, value in _part_re.findall(match.group('rest')):
+        if id_:
+            checks.append(lambda node, id_=id_: node.attrs.get('id') == id_)
+        elif class_:
+            checks.append(
+                lambda node, class_=class_: class_ in node.attrs.get('class', '').split())
+        elif value:
+            value = value.strip('\'"')
+            checks.append(lambda node, attr=attr, value=value: node.attrs.get(attr) == value)
+        else:
+            checks.append(lambda node, attr=attr: attr in node.attrs)
+    return lambda node: all(check(node) for check in checks)
+
+
+def compile_css(selector):
+    """
+    Compile a small subset of CSS: compound selectors of tag, `#id`, `.class`
+    and `[attr=value]`, joined by descendant and `>` combinators.
+    """
+    tokens = selector.replace('>', ' > ').split()
+    steps = []
+    combinator = None
+    for token in tokens:
+        if token == '>':
+            combinator = '>'
+            continue
+        steps.append((combinator, _compile_compound(token)))
+        combinator = ' '
+    steps.reverse()
+
+    def matches(node, root, index=0):
+        combinator, check = steps[index][0], steps[index][1]
+        if not check(node):
+            return False
+        if index + 1 == len(steps):
+            return True
+        ancestor = node.parent
+        while ancestor is not None and ancestor is not root:
+            if matches(ancestor, root, index + 1):
+                return True
+            if combinator == '>':
+                return False
+            ancestor = ancestor.parent
+        return False
+    return matches
+
+
+def find(root, by, value):
+    if by == By.ID:
+        check = lambda node: node.attrs.get('id') == value
+    elif by == By.NAME:
+        check = lambda node: node.attrs.get('name') == value
+    elif by == By.CLASS_NAME:
+        check = lambda node: value in node.attrs.get('class', '').split()
+    elif by == By.TAG_NAME:
+        check = lambda node: node.tag == value
+    elif by == By.LINK_TEXT:
+        check = lambda node: node.tag == 'a' and node.visible_text() == value
+    elif by == By.CSS_SELECTOR:
+        matches = compile_css(value)
+        check = lambda node: matches(node, root)
+    else:
+        raise WebDriverException('Unsupported locator strategy: %r' % by)
+    return [node for node in root.descendants() if check(node)]
+
+
+class FakeWebElement(object):
+
+    def __init__(self, driver, node):
+        self.parent = driver
+        self.node = node
+
+    def __eq__(self, other):
+        return isinstance(other, FakeWebElement) and self.node is other.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self.node)
+
+    def find_elements(self, by, value):
+        self.parent.execute('findChildElements')
+        return self.parent.wrap(find(self.node, by, value))
+
+    def is_displayed(self):
+        self.parent.execute('isElementDisplayed')
+        return self.node.is_displayed()
+
+    def get_attribute(self, name):
+        self.parent.execute('getElementAttribute')
+        if name == 'value':
+            return self.node.value
+        return self.node.attrs.get(name)
+
+    @property
+    def text(self):
+        self.parent.execute('getElementText')
+        return self.node.visible_text()
+
+    def is_selected(self):
+        self.parent.execute('isElementSelected')
+        return self.node.checked
+
+    def clear(self):
+        self.parent.execute('clearElement')
+        self.node.value = ''
+
+    def click(self):
+        self.parent.execute('clickElement')
+        self.parent.click(self.node)
+
+    def send_keys(self, keys):
+        self.parent.execute('sendKeysToElement')
+        self.node.value = (self.node.value or '') + keys
+
+
+class FakeDriver(ScriptEmulation):
+
+    """
+    `pages` maps URLs to functions building their DOM (a `Node`), which is
+    rebuilt on every navigation.  Clicking a node with `href` navigates.
+    """
+
+    def __init__(self, pages, latency=0.002, jitter=0.0005, scripts_enabled=True,
+                 seed=0):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.scripts_enabled = scripts_enabled
+        self.random = random.Random(seed)
+        self.commands = 0
+        self.url = None
+        self.document = Node('html')
+
+    def execute(self, command, params=None):
+        self.commands += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def wrap(self, nodes):
+        return [FakeWebElement(self, node) for node in nodes]
+
+    def get(self, url):
+        self.execute('get')
+        self.navigate(url)
+
+    def navigate(self, url):
+        self.url = url
+        self.document = self.pages[url]()
+
+    def click(self, node):
+        if node.href is not None:
+            self.navigate(node.href)
+        elif node.attrs.get('type') == 'checkbox':
+            node.checked = not node.checked
+
+    @property
+    def current_url(self):
+        self.execute('getCurrentUrl')
+        return self.url
+
+    def find_elements(self, by, value):
+        self.execute('findElements')
+        return self.wrap(find(self.document, by, value))
+
+    def quit(self):
+        pass
+
+    def execute_script(self, script, root=None, *args):
+        self.execute('executeScript')
+        if not self.scripts_enabled:
+            raise WebDriverException('javascript is disabled')
+        return self.emulate_script(script, root, args)
+
+    def execute_async_script(self, script, root=None, *args):
+        # The synthetic DOM never changes by itself, so waits could only time
+        # out.  Pretend async scripts are unsupported to keep benchmarks fast.
+        self.execute('executeAsyncScript')
+        raise WebDriverException('async scripts are not supported')
+
+    def _root(self, root):
+        return self.document if root is None else root.node
+
+    def _visible(self, root, by, value):
+        return [node for node in find(root, by, value) if node.is_displayed()]
+
+    def _present(self, root, by, value):
+        return find(root, by, value)
+
+    def _wrap(self, nodes):
+        return self.wrap(nodes)
+
+    def _read(self, node, prop):
+        return node.read(prop)
+
+    def _write(self, node, prop, value):
+        node.write(prop, value)
+
+    def _unsupported(self, script):
+        raise WebDriverException('Unsupported script')
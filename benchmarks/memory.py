@@ -0,0 +1,98 @@
+"""
+Client memory taken by the rows of a large `ElementList`, when all are held.
+
+    python -m benchmarks.memory [--rows N]
+
+Rows come from selenium's remote driver, talking to an in-process executor
+which serves a list of `N` elements, so they hold what they would with a real
+browser.  They are compared with rows keeping a `WebElement` in a `__dict__`,
+as `FragmentObject` used to.  Sizes are summed over everything the rows
+reference which isn't shared with the rest of the process (the driver and
+classes).
+"""
+import argparse
+import gc
+import sys
+import uuid
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from webel import scripts
+from webel.driver import use_driver
+from webel.elements import FragmentObject, ElementList, ReadOnlyText
+from webel.page import Page
+
+
+class Executor(object):
+
+    """Answers the commands which iterating a `rows` element list needs."""
+
+    def __init__(self, rows):
+        self.ids = [str(uuid.uuid4()) for _ in range(rows)]
+
+    def execute(self, command, params):
+        if command == Command.NEW_SESSION:
+            return {'status': 0, 'sessionId': 'memory', 'value': {}}
+        if command == Command.EXECUTE_SCRIPT and params['script'] == scripts.COUNT_ELEMENTS:
+            return {'status': 0, 'value': len(self.ids)}
+        if command == Command.EXECUTE_SCRIPT and params['script'] == scripts.FIND_ELEMENTS_SLICE:
+            root, by, value, start, stop = params['args']
+            return {'status': 0, 'value': [{'ELEMENT': id} for id in self.ids[start:stop]]}
+        return {'status': 13, 'value': {'message': 'Unsupported command: %s' % command}}
+
+
+class Row(FragmentObject):
+    price = ReadOnlyText('class=price')
+
+
+class GridPage(Page):
+    rows = ElementList('css=tr', Row)
+
+
+class PlainRow(object):
+
+    """A row like before compact rows: attributes in a `__dict__`."""
+
+    def __init__(self, webelement):
+        self.webelement = webelement
+        self.webelement_cache = None
+
+
+def footprint(objects, shared):
+    """Return the bytes taken by `objects` and what they reference, but `shared`."""
+    seen = set(id(obj) for obj in shared)
+    total = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='number of rows (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    driver = WebDriver(Executor(args.rows), desired_capabilities={})
+    with use_driver(driver):
+        compact = list(GridPage().rows)
+    plain = [PlainRow(row.webelement) for row in compact]
+    assert len(compact) == args.rows
+
+    print('%-10s %12s %12s' % ('rows', 'plain, B', 'compact, B'))
+    plain_size, compact_size = footprint(plain, [driver]), footprint(compact, [driver])
+    print('%-10d %12d %12d' % (args.rows, plain_size, compact_size))
+    print('%-10s %12.1f %12.1f' % ('per row', plain_size / float(args.rows),
+                                  compact_size / float(args.rows)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Run the benchmark scenarios and compare them with the stored baseline.
+
+    python -m benchmarks.run [--latency SECONDS] [--jitter SECONDS] [--no-scripts]
+                             [--only SCENARIO ...] [--update-baseline] [--check]
+
+Round trips are deterministic, so any increase over the baseline is reported
+as a regression (and fails the run with `--check`); wall time depends on the
+machine and is only shown for comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from benchmarks.fake_driver import FakeDriver
+from benchmarks.scenarios import PAGES, SCENARIOS
+from webel.driver import use_driver
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def run_scenario(scenario, latency, jitter, scripts_enabled):
+    driver = FakeDriver(PAGES, latency=latency, jitter=jitter,
+                        scripts_enabled=scripts_enabled)
+    with use_driver(driver):
+        start = time.time()
+        scenario()
+        seconds = time.time() - start
+    return {'commands': driver.commands, 'seconds': round(seconds, 3)}
+
+
+def load_baseline(path, mode):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get(mode, {})
+
+
+def save_baseline(path, mode, results):
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data.setdefault(mode, {}).update(results)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True, separators=(',', ': '))
+        f.write('\n')
+
+
+def format_report(results, baseline):
+    lines = ['%-22s %9s %9s %9s %9s  %s' % (
+        'scenario', 'commands', 'baseline', 'time, s', 'baseline', '')]
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        status = ''
+        if base and result['commands'] > base['commands']:
+            status = 'REGRESSION'
+            regressions.append(name)
+        lines.append('%-22s %9d %9s %9.3f %9s  %s' % (
+            name, result['commands'], base.get('commands', '-'), result['seconds'],
+            base.get('seconds', '-'), status))
+    return '\n'.join(lines), regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='seconds every command takes (default: %(default)s)')
+    parser.add_argument('--jitter', type=float, default=0.0005,
+                        help='random deviation of the latency (default: %(default)s)')
+    parser.add_argument('--no-scripts', action='store_true',
+                        help='benchmark the fallbacks for drivers without javascript')
+    parser.add_argument('--only', nargs='+', choices=list(SCENARIOS), metavar='SCENARIO')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with 1 when round trips regressed')
+    args = parser.parse_args(argv)
+
+    mode = 'no-scripts' if args.no_scripts else 'scripts'
+    results = OrderedDict()
+    for name, scenario in SCENARIOS.items():
+        if not args.only or name in args.only:
+            results[name] = run_scenario(
+                scenario, args.latency, args.jitter, not args.no_scripts)
+
+    report, regressions = format_report(results, load_baseline(args.baseline, mode))
+    print(report)
+    if args.update_baseline:
+        save_baseline(args.baseline, mode, results)
+    if args.check and regressions:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
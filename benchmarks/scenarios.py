@@ -0,0 +1,204 @@
+"""
+Benchmark scenarios: page objects over the synthetic pages of `PAGES`.
+
+Each scenario is a function run with a fresh `FakeDriver` bound to the thread.
+"""
+from collections import OrderedDict
+
+from benchmarks.fake_driver import Node
+from webel import (
+    Page, Text, ReadOnlyText, Checkbox, Link, Fragment, FragmentObject, ElementList)
+
+FIELDS = 30
+CHECKBOXES = 10
+ROWS = 10000
+NAVIGATIONS = 20
+REPEATS = 10
+
+
+def form_dom():
+    return Node('html', [Node('form', (
+        [Node('input', name='field%d' % i, value='') for i in range(FIELDS)] +
+        [Node('input', type='checkbox', id='check%d' % i) for i in range(CHECKBOXES)] +
+        [Node('label', id='label%d' % i, text='Label %d' % i) for i in range(CHECKBOXES)]
+    ))])
+
+
+def grid_dom():
+    return Node('html', [Node('table', [
+        Node('tr', [
+            Node('td', text='Item %d' % i, **{'class': 'name'}),
+            Node('td', text='%d.00' % i, **{'class': 'price'}),
+            Node('td', [Node('input', name='qty', value=str(i % 7))]),
+        ], **{'class': 'row'})
+        for i in range(ROWS)
+    ])])
+
+
+def nested_dom():
+    return Node('html', [
+        Node('div', [Node('div', [Node('div', [Node('div', [
+            Node('input', name='leaf', value='deep'),
+        ], id='l4')], id='l3')], id='l2')], id='l1'),
+    ])
+
+
+def link_dom(title, to):
+    return lambda: Node('html', [
+        Node('h1', text=title, id='title'),
+        Node('a', text='Next', id='next', href=to),
+    ])
+
+
+PAGES = {
+    'http://bench/form': form_dom,
+    'http://bench/grid': grid_dom,
+    'http://bench/nested': nested_dom,
+    'http://bench/a': link_dom('A', 'http://bench/b'),
+    'http://bench/b': link_dom('B', 'http://bench/a'),
+}
+
+
+def _form_attrs():
+    attrs = {'url': 'http://bench/form'}
+    for i in range(FIELDS):
+        attrs['field%d' % i] = Text('name=field%d' % i)
+    for i in range(CHECKBOXES):
+        attrs['check%d' % i] = Checkbox('id=check%d' % i)
+        attrs['label%d' % i] = ReadOnlyText('id=label%d' % i)
+    return attrs
+
+FormPage = type('FormPage', (Page,), _form_attrs())
+
+
+class Row(FragmentObject):
+    name = ReadOnlyText('class=name')
+    price = ReadOnlyText('class=price')
+    qty = Text('name=qty')
+
+
+class GridPage(Page):
+    url = 'http://bench/grid'
+    rows = ElementList('class=row', Row)
+
+
+class Level4(FragmentObject):
+    leaf = Text('name=leaf')
+
+
+class Level3(FragmentObject):
+    l4 = Fragment('id=l4', Level4)
+
+
+class Level2(FragmentObject):
+    l3 = Fragment('id=l3', Level3)
+
+
+class Level1(FragmentObject):
+    l2 = Fragment('id=l2', Level2)
+
+
+class NestedPage(Page):
+    url = 'http://bench/nested'
+    l1 = Fragment('id=l1', Level1)
+
+
+class PageB(Page):
+    url = 'http://bench/b'
+    title = ReadOnlyText('id=title')
+
+
+class PageA(Page):
+    url = 'http://bench/a'
+    title = ReadOnlyText('id=title')
+    next = Link('id=next', to=PageB)
+
+
+PageB.next = Link('id=next', to=PageA)
+
+
+class PrefetchedPageB(PageB):
+    pass
+
+
+class PrefetchedPageA(PageA):
+    next = Link('id=next', to=PrefetchedPageB, prefetch=True)
+
+
+PrefetchedPageB.next = Link('id=next', to=PrefetchedPageA, prefetch=True)
+
+
+def single_reads():
+    page = FormPage(load=True)
+    for _ in range(REPEATS):
+        page.field0
+        page.label0
+        page.check0
+
+
+def form_fill_attributes():
+    page = FormPage(load=True)
+    for i in range(FIELDS):
+        setattr(page, 'field%d' % i, 'value %d' % i)
+    for i in range(CHECKBOXES):
+        setattr(page, 'check%d' % i, True)
+
+
+def form_fill_batched():
+    page = FormPage(load=True)
+    values = dict(('field%d' % i, 'value %d' % i) for i in range(FIELDS))
+    values.update(('check%d' % i, True) for i in range(CHECKBOXES))
+    page.fill(**values)
+
+
+def form_snapshot():
+    FormPage(load=True).snapshot()
+
+
+def element_list_10k():
+    rows = GridPage(load=True).rows
+    assert len(rows) == ROWS
+    rows[ROWS // 2].price
+    for i, row in enumerate(rows):
+        if i == 100:
+            break
+    assert len(rows.column('class=price')) == ROWS
+
+
+def nested_fragments():
+    page = NestedPage(load=True)
+    for _ in range(REPEATS):
+        assert page.l1.l2.l3.l4.leaf == 'deep'
+
+
+def link_navigation():
+    page = PageA(load=True)
+    for _ in range(NAVIGATIONS):
+        page = page.next()
+
+
+def link_navigation_reads():
+    page = PageA(load=True)
+    for _ in range(NAVIGATIONS):
+        page = page.next()
+        page.title
+
+
+def link_navigation_prefetch():
+    page = PrefetchedPageA(load=True)
+    for _ in range(NAVIGATIONS):
+        page = page.next()
+        page.title
+
+
+SCENARIOS = OrderedDict((scenario.__name__, scenario) for scenario in [
+    single_reads,
+    form_fill_attributes,
+    form_fill_batched,
+    form_snapshot,
+    element_list_10k,
+    nested_fragments,
+    link_navigation,
+    link_navigation_reads,
+    link_navigation_prefetch,
+])
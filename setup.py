@@ -9,5 +9,6 @@ setup(
     license='LICENSE',
     description='Helpers for doing web-testing with Webdriver',
     long_description=open('README.rst').read(),
-    install_requires=['selenium'],
+    install_requires=['selenium>=3.14'],
+    extras_require={'frozen': ['lxml', 'cssselect']},
 )
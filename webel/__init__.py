@@ -1,5 +1,5 @@
 from webel.page import Page
-from webel.driver import set_driver, get_driver
+from webel.driver import set_driver, get_driver, use_driver, DriverPool
 from webel.elements import (
 	Link, Text, Button, ReadOnlyText, Fragment, FragmentObject, Checkbox, ElementList,
 	Element, CheckingText)
@@ -0,0 +1,154 @@
+"""
+States of a page `Page.wait_for` can wait for.
+
+    page.wait_for(any_of=['dashboard', Visible('error_banner')])
+    page.wait_for(all_of=[TextEquals('status', 'Saved'), URLMatches(ItemPage)])
+
+Elements are named by the page's descriptors, fragments separated by dots
+('address.city').  A plain name stands for `Visible(name)`.
+"""
+import re
+from urlparse import urlparse, urlunparse
+
+from webel.elements import Element, Fragment, ElementList, readers
+from webel.exceptions import NoSuchElementException, MultipleElementsSelectedException
+from webel.webelement_getters import get_element, get_elements
+
+
+class Condition(object):
+
+    # The kind of condition, as understood by `scripts.WAIT_FOR_CONDITIONS`.
+    state = None
+
+    def spec(self, page_cls):
+        """Return the condition for `scripts.WAIT_FOR_CONDITIONS`."""
+        raise NotImplementedError
+
+    def holds(self, page):
+        """Check the condition with plain WebDriver commands, without waiting."""
+        raise NotImplementedError
+
+
+class ElementCondition(Condition):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.name)
+
+    def descriptors(self, page_cls):
+        """Return descriptors along the dotted `name`, starting from `page_cls`."""
+        descriptors = []
+        cls = page_cls
+        for part in self.name.split('.'):
+            if cls is None:
+                raise TypeError('%r: only fragments have elements.' % self.name)
+            descriptor = next((vars(klass)[part] for klass in cls.__mro__
+                               if part in vars(klass)), None)
+            if not isinstance(descriptor, (Element, ElementList)):
+                raise TypeError('%s has no element %r.' % (cls.__name__, part))
+            descriptors.append(descriptor)
+            cls = descriptor.fragment_object_cls if isinstance(descriptor, Fragment) else None
+        return descriptors
+
+    def spec(self, page_cls):
+        steps = []
+        for descriptor in self.descriptors(page_cls):
+            strategy, value = descriptor.parsed_locator
+            steps.append({'locator': descriptor.locator, 'by': strategy, 'value': value})
+        return {'state': self.state, 'steps': steps}
+
+    def find(self, page):
+        """Return the container of the last descriptor and the descriptor."""
+        descriptors = self.descriptors(type(page))
+        container = page.webelement
+        for descriptor in descriptors[:-1]:
+            container = get_element(descriptor.locator, container)
+        return container, descriptors[-1]
+
+    def holds(self, page):
+        try:
+            return self.found(*self.find(page))
+        except (NoSuchElementException, MultipleElementsSelectedException):
+            return False
+
+
+class Present(ElementCondition):
+
+    """At least one element matches, visible or not."""
+
+    state = 'present'
+
+    def found(self, container, descriptor):
+        return bool(get_elements(descriptor.locator, container))
+
+
+class Visible(ElementCondition):
+
+    """Exactly one element is visible, so reading the descriptor wouldn't wait."""
+
+    state = 'visible'
+
+    def found(self, container, descriptor):
+        get_element(descriptor.locator, container)
+        return True
+
+
+class TextEquals(ElementCondition):
+
+    """The element is visible and reading the descriptor would return `text`."""
+
+    state = 'text'
+
+    def __init__(self, name, text):
+        super(TextEquals, self).__init__(name)
+        self.text = text
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (type(self).__name__, self.name, self.text)
+
+    def property(self, descriptor):
+        return getattr(descriptor, 'snapshot_property', None) or 'text'
+
+    def spec(self, page_cls):
+        spec = super(TextEquals, self).spec(page_cls)
+        spec['property'] = self.property(self.descriptors(page_cls)[-1])
+        spec['expected'] = self.text
+        return spec
+
+    def found(self, container, descriptor):
+        webelement = get_element(descriptor.locator, container)
+        return readers[self.property(descriptor)](webelement) == self.text
+
+
+class URLMatches(Condition):
+
+    """
+    The URL without the query string matches `url`, a template like
+    `Page.url` or a page class.
+    """
+
+    state = 'url'
+
+    def __init__(self, url):
+        if isinstance(url, type):
+            if url.url is None:
+                raise TypeError('%s has no url.' % url.__name__)
+            url = url.url
+        self.url = url
+        # Like `Page._compile_url`, but escaped and without named groups,
+        # which javascript spells differently.
+        parts = re.split(r'{\w+}', url)
+        self.pattern = '^%s$' % r'[\w-]+'.join(re.escape(part) for part in parts)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.url)
+
+    def spec(self, page_cls):
+        return {'state': self.state, 'pattern': self.pattern}
+
+    def holds(self, page):
+        parsed = list(urlparse(page.driver.current_url))
+        parsed[4] = ''  # Remove query.
+        return re.match(self.pattern, urlunparse(parsed)) is not None
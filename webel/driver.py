@@ -1,4 +1,19 @@
+"""
+The driver used by pages and descriptors.
+
+`set_driver` sets the default for the whole process.  `use_driver` binds a
+driver to the current thread only, so several browsers can be driven from one
+process at the same time, and `DriverPool` hands such drivers out to threads.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
 _driver = None
+_local = threading.local()
 
 
 def set_driver(b):
@@ -7,4 +22,141 @@ def set_driver(b):
 
 
 def get_driver():
-	return _driver
+	return getattr(_local, 'driver', None) or _driver
+
+
+@contextmanager
+def use_driver(driver):
+	"""Make `get_driver` return `driver` in the current thread within the block."""
+	previous = getattr(_local, 'driver', None)
+	_local.driver = driver
+	try:
+		yield driver
+	finally:
+		_local.driver = previous
+
+
+def reset_driver(driver):
+	"""
+	Clear cookies and web storage and leave the page.
+
+	WebDriver can only see cookies and storage of the current document's
+	origin, so state of other origins visited in the session survives.
+	"""
+	try:
+		driver.execute_script(
+			'window.localStorage.clear(); window.sessionStorage.clear();')
+	except WebDriverException:
+		pass  # E.g. on about:blank, which has no storage.
+	driver.delete_all_cookies()
+	driver.get('about:blank')
+
+
+class DriverPool(object):
+
+	"""
+	Leases drivers created by `factory` to threads.
+
+	At most `max_size` drivers are created; `lease` blocks when all of them are
+	in use.  Drivers are reset with `reset` (`reset_driver` by default) when
+	returned, and dropped if that fails.
+	"""
+
+	def __init__(self, factory, max_size, reset=reset_driver):
+		self.factory = factory
+		self.max_size = max_size
+		self.reset = reset
+		self._idle = deque()
+		# Guards `_idle` and `_drivers`, notified when a driver is returned or
+		# a slot for a new one frees up.
+		self._changed = threading.Condition(threading.Lock())
+		self._drivers = []
+		self._closed = False
+
+	def prewarm(self, number=None):
+		"""Start `number` (by default `max_size`) drivers ahead of time."""
+		number = self.max_size if number is None else number
+		for _ in range(number):
+			with self._changed:
+				if not self._reserve():
+					break
+			driver = self._create()
+			with self._changed:
+				self._idle.append(driver)
+				self._changed.notify()
+
+	def _reserve(self):
+		# Called with `_changed` held.  Reserve the slot before the (slow) start
+		# of the browser.
+		if len(self._drivers) >= self.max_size:
+			return False
+		self._drivers.append(None)
+		return True
+
+	def _create(self):
+		# Start a driver in a slot reserved with `_reserve`.
+		try:
+			driver = self.factory()
+		except Exception:
+			with self._changed:
+				self._drivers.remove(None)
+				self._changed.notify()
+			raise
+		with self._changed:
+			self._drivers[self._drivers.index(None)] = driver
+		return driver
+
+	def acquire(self, timeout=None):
+		deadline = None if timeout is None else time.time() + timeout
+		with self._changed:
+			while not self._idle and not self._reserve():
+				remaining = None if deadline is None else deadline - time.time()
+				if remaining is not None and remaining <= 0:
+					raise WebDriverException(
+						'No driver became free in %s seconds.' % timeout)
+				self._changed.wait(remaining)
+			if self._idle:
+				return self._idle.popleft()
+		return self._create()
+
+	def release(self, driver):
+		if self._closed:
+			self._discard(driver)
+			return
+		try:
+			self.reset(driver)
+		except Exception:
+			self._discard(driver)
+		else:
+			with self._changed:
+				self._idle.append(driver)
+				self._changed.notify()
+
+	def _discard(self, driver):
+		with self._changed:
+			self._drivers.remove(driver)
+			# Its slot is free, a waiter can start a new driver.
+			self._changed.notify()
+		try:
+			driver.quit()
+		except Exception:
+			pass
+
+	@contextmanager
+	def lease(self, timeout=None):
+		"""Bind a driver from the pool to the current thread within the block."""
+		driver = self.acquire(timeout=timeout)
+		try:
+			with use_driver(driver):
+				yield driver
+		finally:
+			self.release(driver)
+
+	def close(self):
+		"""Quit all the idle drivers; leased ones are quit when released."""
+		self._closed = True
+		with self._changed:
+			idle = list(self._idle)
+			self._idle.clear()
+		for driver in idle:
+			self._discard(driver)
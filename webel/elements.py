@@ -1,40 +1,122 @@
+import time
+
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.wait import WebDriverWait
 
-from webel.exceptions import MultipleElementsSelectedException
-from webel.webelement_getters import get_element, get_elements
+from webel import scripts
+from webel.exceptions import (
+    StaleElementReferenceException, NoSuchElementException,
+    MultipleElementsSelectedException)
+from webel.instrumentation import descriptor_access, scoped, container_name, record_wait
+from webel.webelement_getters import (
+    get_element, get_elements, get_webelement_cache, compile_locator, run_script,
+    wait_for_element, wait_for_count, count_elements, get_elements_slice,
+    WebElementCache, PrefetchedWebElements, ASYNC_WAIT_SLICE)
+
+
+# How each `Element.snapshot_property` is read from a webelement without scripts.
+readers = {
+    'text': lambda webelement: webelement.text,
+    'value': lambda webelement: webelement.get_attribute('value'),
+    'checked': lambda webelement: webelement.is_selected(),
+}
 
 
 class Element(object):
 
-    def __init__(self, locator):
+    # What `snapshot` reads from the element in the browser: 'value', 'text' or
+    # 'checked'.  Descriptors without it are left out of snapshots.
+    snapshot_property = None
+    # How `fill` writes the element: 'script' sets the value and fires
+    # input/change events from javascript, 'keys' sends real keystrokes via
+    # `write`.  Descriptors without it can't be filled.
+    fill_mode = None
+    # Seconds to wait for the element to become visible.
+    timeout = 20
+
+    def __init__(self, locator, fill_mode=None, timeout=None):
         self.locator = locator
-
-    def get_webelement(self, container, timeout=20):
-        # TODO: move waiting to `webelement_getters`.
-        webelement = WebDriverWait(
-            container.webelement,
-            timeout, ignored_exceptions=(MultipleElementsSelectedException,)
-        ).until(
-            lambda driver: get_element(self.locator, driver),
-            # XXX: there can be several options: not only not found, by it will fail
-            # with the same message when there are several elements returned by the
-            # locator.  Probably it's worth reimplementing WebDriverWait.
-            message="Can't get %r element" % self.locator
-        )
+        self.parsed_locator = compile_locator(locator)
+        if fill_mode is not None:
+            self.fill_mode = fill_mode
+        if timeout is not None:
+            self.timeout = timeout
+
+    def get_webelement(self, container, timeout=None):
+        if isinstance(container, FragmentObject) and container._lazy is not None:
+            webelement = _locate_path(container, self, timeout)
+            if webelement is not None:
+                return webelement
+        cache = get_webelement_cache(container)
+        if cache is not None:
+            webelement = cache.get(container, self)
+            if webelement is not None:
+                return webelement
+        # XXX: there can be several options: not only not found, by it will fail
+        # with the same message when there are several elements returned by the
+        # locator.
+        webelement = wait_for_element(
+            self.locator, container.webelement,
+            timeout=self.timeout if timeout is None else timeout)
+        if cache is not None:
+            cache.set(container, self, webelement)
         return webelement
 
+    def apply(self, container, action, webelement=None):
+        """
+        Call `action` with the webelement (`webelement`, if it's been looked up
+        already) and return its result.
+
+        If a remembered webelement went stale, the element's own or one of the
+        fragments it's in, they are located again and `action` is retried once.
+        """
+        try:
+            if webelement is None:
+                webelement = self.get_webelement(container)
+            return action(webelement)
+        except StaleElementReferenceException:
+            if not _forget_path(container, self):
+                raise
+            return action(self.get_webelement(container))
+
+
+def _forget_path(container, descriptor):
+    """
+    Forget the webelements of `descriptor` and of the fragments `container` is
+    in, so they are located again from the page.  Returns whether there was
+    anything to forget.
+    """
+    cache = get_webelement_cache(container)
+    forgot = cache is not None
+    while isinstance(container, FragmentObject) and container._origin is not None:
+        if cache is not None and container._lazy is None:
+            cache.forget(container, descriptor)
+        container._lazy = container._origin
+        container, descriptor = container._origin
+        forgot = True
+    if cache is not None:
+        cache.forget(container, descriptor)
+    return forgot
+
 
 # TODO: Create one abstract Text element and to implementations: TextInput and TextArea.
 class Text(Element):
 
+    snapshot_property = 'value'
+    fill_mode = 'script'
+
+    @descriptor_access
     def __get__(self, container, container_cls):
-        return self.get_webelement(container).get_attribute('value')
+        return self.apply(container, lambda el: el.get_attribute('value'))
 
+    @descriptor_access
     def __set__(self, container, value):
-        el = self.get_webelement(container)
-        el.clear()
-        el.click()
-        el.send_keys(value)
+        self.apply(container, lambda el: self.write(el, value))
+
+    def write(self, webelement, value):
+        webelement.clear()
+        webelement.click()
+        webelement.send_keys(value)
 
 
 class CheckingText(Element):
@@ -45,14 +127,21 @@ class CheckingText(Element):
     May be helpful when dealing with tricky javascript-heavy controls.
     """
 
+    snapshot_property = 'value'
+    fill_mode = 'keys'
+
+    @descriptor_access
     def __get__(self, container, container_cls=None):
-        return self.get_webelement(container).get_attribute('value')
+        return self.apply(container, lambda el: el.get_attribute('value'))
 
+    @descriptor_access
     def __set__(self, container, value):
-        el = self.get_webelement(container)
-        el.click()
-        el.send_keys(value)
-        self.check(container, value)
+        self.apply(container, lambda el: self.write(el, value))
+
+    def write(self, webelement, value):
+        webelement.click()
+        webelement.send_keys(value)
+        assert value == webelement.get_attribute('value')
 
     def check(self, container, value):
         new_value = self.__get__(container)
@@ -62,48 +151,83 @@ class CheckingText(Element):
 
 class ReadOnlyText(Element):
 
+    snapshot_property = 'text'
+
+    @descriptor_access
     def __get__(self, container, container_cls):
-        webelement = self.get_webelement(container)
-        return webelement.text
+        return self.apply(container, lambda el: el.text)
 
 
 class Checkbox(Element):
 
+    snapshot_property = 'checked'
+    fill_mode = 'script'
+
+    @descriptor_access
     def __get__(self, container, container_cls):
-        webelement = self.get_webelement(container)
-        return webelement.is_selected()
+        return self.apply(container, lambda el: el.is_selected())
 
+    @descriptor_access
     def __set__(self, container, value):
-        webelement = self.get_webelement(container)
+        self.apply(container, lambda el: self.write(el, value))
+
+    def write(self, webelement, value):
         if webelement.is_selected() != value:
             webelement.click()
 
 
 class LinkObject(object):
 
-    def __init__(self, webelement, to_page_cls):
+    # One is created per access, so no `__dict__`.
+    __slots__ = ('webelement', 'to_page_cls', 'webelement_cache', 'prefetch', 'origin')
+
+    def __init__(self, webelement, to_page_cls, webelement_cache=None, prefetch=False,
+                 origin=None):
         self.webelement = webelement
         self.to_page_cls = to_page_cls
+        self.webelement_cache = webelement_cache
+        self.prefetch = prefetch
+        # `(container, Link descriptor)`, to locate the link again when stale.
+        self.origin = origin
 
     def __call__(self):
         return self.click()
 
     def click(self):
-        self.webelement.click()
+        if self.origin is None:
+            self.webelement.click()
+        else:
+            container, link = self.origin
+            link.apply(container, lambda webelement: webelement.click(), self.webelement)
+        if self.webelement_cache is not None:
+            # We have probably navigated away, remembered webelements are gone.
+            self.webelement_cache.clear()
         if self.to_page_cls is not None:
             assert_is_on_page = self.to_page_cls.url is not None
             page = self.to_page_cls(assert_is_on_page=assert_is_on_page)
+            # Without a URL to wait for, the old page may still be there.
+            if self.prefetch and assert_is_on_page:
+                prefetch(page)
             return page
 
 
 class Link(Element):
 
-    def __init__(self, locator, to=None):
-        super(Link, self).__init__(locator)
+    # Whether to locate all elements of the `to` page as soon as it's loaded,
+    # see `prefetch`.
+    prefetch = False
+
+    def __init__(self, locator, to=None, timeout=None, prefetch=None):
+        super(Link, self).__init__(locator, timeout=timeout)
         self.to_page_cls = to
+        if prefetch is not None:
+            self.prefetch = prefetch
 
+    @descriptor_access
     def __get__(self, container, container_cls):
-        return LinkObject(self.get_webelement(container), self.to_page_cls)
+        return self.apply(container, lambda webelement: LinkObject(
+            webelement, self.to_page_cls, webelement_cache=get_webelement_cache(container),
+            prefetch=self.prefetch, origin=(container, self)))
 
 
 Button = Link
@@ -111,38 +235,616 @@ Button = Link
 
 class ElementList(object):
 
-    def __init__(self, locator, list_object_cls):
+    # Seconds to wait for at least one element to appear.
+    timeout = 10
+    # Rows fetched by one round trip when iterating, in `ListObjects.values`
+    # and in `ListObjects.column`.
+    chunk_size = 500
+
+    def __init__(self, locator, list_object_cls, timeout=None, chunk_size=None):
         self.locator = locator
+        self.parsed_locator = compile_locator(locator)
         self.list_object_cls = list_object_cls
+        if timeout is not None:
+            self.timeout = timeout
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
 
+    @descriptor_access
     def __get__(self, container, container_cls):
-        # TODO: move waiting to `webelement_getters`.
-        timeout = 10
-        webelements = WebDriverWait(
-            container.webelement, timeout,
-        ).until(
-            lambda driver: get_elements(self.locator, driver),
-            message="Can't get %r elements" % self.locator
-        )
-        return [
-            self.list_object_cls(webelement) for webelement in webelements
-        ]
+        wait_for_count(self.locator, container.webelement, timeout=self.timeout)
+        return ListObjects(self, container)
+
+
+class ListObjects(object):
+
+    """
+    What `ElementList` returns: a lazy sequence of `list_object_cls` instances.
+
+    Nothing is kept between calls: `len()` counts the elements in the browser,
+    indexing and slicing fetch only the requested elements and iteration
+    fetches `ElementList.chunk_size` of them at a time.
+    """
+
+    def __init__(self, element_list, container):
+        self.element_list = element_list
+        self.webelement = container.webelement
+        self.container_name = container_name(container)
+        self.webelement_cache = get_webelement_cache(container)
+
+    @scoped(lambda self: (self.container_name, self.element_list.locator))
+    def __len__(self):
+        return count_elements(self.element_list.locator, self.webelement)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start or 0, index.stop, index.step or 1
+            if start >= 0 and stop is not None and stop >= 0 and step > 0:
+                return self._get_slice(start, max(start, stop))[::step]
+            # Negative bounds or step: resolve them against the length, fetch
+            # the span the indices cover and pick them from it.
+            indices = range(*index.indices(len(self)))
+            if not indices:
+                return []
+            first = min(indices)
+            list_objects = self._get_slice(first, max(indices) + 1)
+            return [list_objects[i - first] for i in indices if i - first < len(list_objects)]
+        if index < 0:
+            index += len(self)
+        list_objects = self._get_slice(index, index + 1) if index >= 0 else []
+        if not list_objects:
+            raise IndexError('%r has no element %d' % (self.element_list.locator, index))
+        return list_objects[0]
+
+    def __iter__(self):
+        chunk_size = self.element_list.chunk_size
+        start = 0
+        while True:
+            list_objects = self._get_slice(start, start + chunk_size)
+            for list_object in list_objects:
+                yield list_object
+            if len(list_objects) < chunk_size:
+                return
+            start += chunk_size
+
+    @scoped(lambda self: (self.container_name, self.element_list.locator))
+    def _get_slice(self, start, stop):
+        webelements = get_elements_slice(
+            self.element_list.locator, start, stop, container=self.webelement)
+        list_objects = []
+        for webelement in webelements:
+            list_object = self.element_list.list_object_cls(webelement)
+            list_object.webelement_cache = self.webelement_cache
+            list_objects.append(list_object)
+        return list_objects
+
+    @scoped(lambda self: (self.container_name, self.element_list.locator))
+    def values(self):
+        """Return a dict of readable descriptor values (like `snapshot`) per row."""
+        specs = _snapshot_specs(self.element_list.list_object_cls)
+        values = self._read_rows(specs)
+        if values is None:
+            values = [_read_descriptors(list_object, specs) for list_object in self]
+        return values
+
+    @scoped(lambda self: (self.container_name, self.element_list.locator))
+    def column(self, locator, property='text'):
+        """
+        Return `property` ('text', 'value' or 'checked') of the element found
+        by `locator` in every row.
+        """
+        if property not in readers:
+            raise ValueError('Unknown property %r.' % property)
+        strategy, value = compile_locator(locator)
+        specs = [{'name': 'cell', 'locator': locator, 'by': strategy, 'value': value,
+                  'property': property}]
+        values = self._read_rows(specs)
+        if values is None:
+            read = readers[property]
+            return [read(get_element(locator, list_object.webelement))
+                    for list_object in self]
+        return [row['cell'] for row in values]
+
+    def _read_rows(self, specs):
+        # One script per `chunk_size` rows, which locates and reads them.
+        if not specs:
+            return [{} for list_object in self]
+        strategy, value = self.element_list.parsed_locator
+        chunk_size = self.element_list.chunk_size
+        values = []
+        start = 0
+        while True:
+            result = _run_batch(
+                self.webelement, scripts.SNAPSHOT_ROWS,
+                (strategy, value, start, start + chunk_size, specs),
+                self.element_list.timeout,
+                message="Can't read rows of %r" % self.element_list.locator)
+            if result is None:
+                return None
+            values.extend(result['values'])
+            if len(result['values']) < chunk_size:
+                return values
+            start += chunk_size
+
+
+def iter_descriptors(cls):
+    """Iterate `(name, descriptor)` for every `Element` of `cls` and its bases."""
+    descriptors = cls.__dict__.get('_descriptors')
+    if descriptors is None:
+        descriptors = _collect_descriptors(cls)
+    return iter(descriptors)
+
+
+def _collect_descriptors(cls, kinds=None):
+    # `kinds` are the descriptor classes to collect, `Element` by default.
+    kinds = Element if kinds is None else kinds
+    seen = set()
+    for klass in cls.__mro__:
+        for name, attr in sorted(vars(klass).items()):
+            if name in seen:
+                continue
+            seen.add(name)
+            if isinstance(attr, kinds):
+                yield name, attr
+
+
+class ContainerMeta(type):
+
+    """
+    Collects `Element` descriptors of page and fragment classes once, when the
+    class is created, so `snapshot` and `fill` don't walk the MRO every time.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(ContainerMeta, cls).__init__(name, bases, attrs)
+        cls._descriptors = tuple(_collect_descriptors(cls))
+
+    def __setattr__(cls, name, value):
+        # What `name` resolved to, maybe in a base class, without `__get__`.
+        replaced = next((klass.__dict__[name] for klass in cls.__mro__
+                         if name in klass.__dict__), None)
+        super(ContainerMeta, cls).__setattr__(name, value)
+        if isinstance(value, Element) or isinstance(replaced, Element):
+            cls._recollect_descriptors()
+
+    def __delattr__(cls, name):
+        super(ContainerMeta, cls).__delattr__(name)
+        cls._recollect_descriptors()
+
+    def _recollect_descriptors(cls):
+        # Subclasses inherit descriptors, so theirs change too.
+        type.__setattr__(cls, '_descriptors', tuple(_collect_descriptors(cls)))
+        for subclass in cls.__subclasses__():
+            subclass._recollect_descriptors()
 
 
 class FragmentObject(object):
 
+    """
+    A fragment of a page, or a row of an `ElementList`.
+
+    Instances are kept small, since lists may have many rows: the state lives
+    in slots, so the `__dict__` is only created if something else is set on
+    them, and of a selenium webelement only its id is kept (the driver is
+    shared), the `WebElement` being made again when `webelement` is read.
+    """
+
+    __metaclass__ = ContainerMeta
+    __slots__ = ('_webelement', '_webelement_cls', '_parent', '_lazy', '_origin',
+                 'webelement_cache', '__dict__', '__weakref__')
+
     def __init__(self, webelement):
+        # Set from the containing page, see `Page.cache_webelements`.
+        self.webelement_cache = None
+        # `(container, Fragment descriptor)` the fragment was got from, to
+        # locate it again when it goes stale.
+        self._origin = None
         self.webelement = webelement
 
+    @property
+    def webelement(self):
+        if self._lazy is not None:
+            container, fragment = self._lazy
+            self.webelement = fragment.get_webelement(container)
+        if self._webelement_cls is not None:
+            return self._webelement_cls(self._parent, self._webelement, w3c=self._parent.w3c)
+        return self._webelement
+
+    @webelement.setter
+    def webelement(self, webelement):
+        if isinstance(webelement, WebElement):
+            self._webelement, self._parent = webelement.id, webelement.parent
+            self._webelement_cls = type(webelement)
+        else:
+            self._webelement, self._parent, self._webelement_cls = webelement, None, None
+        # `(container, Fragment descriptor)` until the fragment is located, see
+        # `Fragment.__get__`.
+        self._lazy = None
+
     def click(self):
-        self.webelement.click()
+        try:
+            self.webelement.click()
+        except StaleElementReferenceException:
+            if self._origin is None:
+                raise
+            # Located again from the page, like elements in `Element.apply`.
+            _forget_path(*self._origin)
+            self._lazy = self._origin
+            self.webelement.click()
+
+    @scoped(lambda self: (container_name(self), '<snapshot>'))
+    def snapshot(self, timeout=20):
+        return take_snapshot(self, timeout=timeout)
+
+    @scoped(lambda self: (container_name(self), '<fill>'))
+    def fill(self, **values):
+        fill(self, values)
 
 
 class Fragment(Element):
 
-    def __init__(self, locator, fragment_object_cls):
-        super(Fragment, self).__init__(locator)
+    def __init__(self, locator, fragment_object_cls, timeout=None):
+        super(Fragment, self).__init__(locator, timeout=timeout)
         self.fragment_object_cls = fragment_object_cls
 
+    @descriptor_access
     def __get__(self, container, container_cls):
-        return self.fragment_object_cls(self.get_webelement(container))
+        # Nothing is looked up yet: the fragment is located when something in
+        # it is, along with it, see `_locate_path`.
+        fragment_object = self.fragment_object_cls(None)
+        fragment_object.webelement_cache = get_webelement_cache(container)
+        fragment_object._lazy = fragment_object._origin = (container, self)
+        return fragment_object
+
+
+def _locate_path(container, descriptor, timeout=None):
+    """
+    Locate `descriptor` in `container`, a fragment not located yet, together
+    with the unlocated fragments `container` is in.
+
+    A single script resolves the whole chain of locators, each of which has
+    to match exactly one visible element inside the previous one, like with
+    `get_element`.  Fragments on the way get their webelements set and
+    remembered in the cache.  Returns `None` when only `descriptor` is left to
+    be looked up: the rest was cached, or the driver can't run scripts and the
+    fragments were located one by one.
+    """
+    steps = [(container, descriptor)]
+    while isinstance(container, FragmentObject) and container._lazy is not None:
+        steps.append(container._lazy)
+        container = container._lazy[0]
+    steps.reverse()
+    cache = get_webelement_cache(container)
+    while cache is not None and len(steps) > 1:
+        webelement = cache.get(*steps[0])
+        if webelement is None:
+            break
+        steps.pop(0)
+        steps[0][0].webelement = webelement
+    if len(steps) == 1:
+        return None
+
+    path = []
+    for parent, step in steps:
+        strategy, value = step.parsed_locator
+        path.append({'locator': step.locator, 'by': strategy, 'value': value})
+    if timeout is None:
+        timeout = max(step.timeout for parent, step in steps)
+    result = _wait_for_path(
+        steps[0][0].webelement, path, timeout,
+        message="Can't get %r element" % ' '.join(step['locator'] for step in path))
+    if result is None:
+        for (parent, fragment), (fragment_object, step) in zip(steps, steps[1:]):
+            fragment_object.webelement = fragment.get_webelement(parent)
+        return None
+    for i, (parent, step) in enumerate(steps):
+        webelement = result['found'][i]
+        if cache is not None:
+            cache.set(parent, step, webelement)
+        if i + 1 < len(steps):
+            steps[i + 1][0].webelement = webelement
+    return webelement
+
+
+def _snapshot_specs(cls):
+    specs = []
+    for name, descriptor in iter_descriptors(cls):
+        strategy, value = descriptor.parsed_locator
+        spec = {'name': name, 'locator': descriptor.locator, 'by': strategy, 'value': value}
+        if isinstance(descriptor, Fragment):
+            spec['children'] = _snapshot_specs(descriptor.fragment_object_cls)
+            if not spec['children']:
+                continue
+        elif descriptor.snapshot_property is not None:
+            spec['property'] = descriptor.snapshot_property
+        else:
+            continue
+        specs.append(spec)
+    return specs
+
+
+def _wait_for_path(webelement, path, timeout, message):
+    """
+    Run `FIND_PATH` in `webelement`, waiting until none of its steps are
+    missing.
+
+    Like `wait_for`, after a failed first try the path is waited for in the
+    browser by `WAIT_FOR_PATH`, and only drivers without async scripts poll.
+    Returns the result of `FIND_PATH`, or `None` if scripts aren't supported.
+    """
+    result = run_script(webelement, scripts.FIND_PATH, (path,), returns=dict)
+    if result is None or not result['missing']:
+        return result
+    started = time.time()
+    deadline = started + timeout
+    iterations = [1]
+    try:
+        while time.time() < deadline:
+            iterations[0] += 1
+            wait_slice = min(deadline - time.time(), ASYNC_WAIT_SLICE)
+            result = run_script(
+                webelement, scripts.WAIT_FOR_PATH, (path, int(wait_slice * 1000)),
+                returns=dict, asynchronous=True)
+            if result is None:
+                break
+            if not result['missing']:
+                return result
+
+        def poll(driver):
+            iterations[0] += 1
+            result = run_script(webelement, scripts.FIND_PATH, (path,), returns=dict)
+            if result is not None and result['missing']:
+                raise NoSuchElementException(
+                    'Not exactly one visible element for %r' % result['missing'])
+            return result
+        return WebDriverWait(webelement, max(deadline - time.time(), 0)).until(
+            poll, message=message)
+    finally:
+        record_wait(iterations[0], started)
+
+
+def _run_batch(webelement, script, args, timeout, message):
+    """
+    Run `script` in `webelement` until none of its locators are `missing`.
+
+    Returns the result of the script, or `None` if scripts aren't supported.
+    """
+    def run(driver):
+        result = run_script(webelement, script, args, returns=dict)
+        if result is not None and result['missing']:
+            raise NoSuchElementException(
+                'Not exactly one visible element for %r' % result['missing'])
+        return result
+    try:
+        return run(webelement)
+    except NoSuchElementException:
+        return WebDriverWait(webelement, timeout).until(run, message=message)
+
+
+def take_snapshot(container, timeout=20):
+    """
+    Read all readable descriptors of `container` in one go and return a dict.
+
+    Text, ReadOnlyText and Checkbox values are keyed by the attribute name,
+    fragments become nested dicts.  Everything is read by a single script,
+    which is repeated until every locator resolves to exactly one visible
+    element.  Drivers which can't run scripts read the descriptors one by one.
+    """
+    specs = _snapshot_specs(type(container))
+    if not specs:
+        return {}
+    result = _run_batch(
+        container.webelement, scripts.SNAPSHOT, (specs,), timeout,
+        message="Can't get elements for snapshot of %r" % container)
+    if result is None:
+        return _read_descriptors(container, specs)
+    return result['values']
+
+
+def _prefetch_tree(cls):
+    # `[(descriptor, tree of its fragment)]`, and specs for `scripts.LOCATE_ALL`.
+    tree, specs = [], []
+    for name, descriptor in iter_descriptors(cls):
+        strategy, value = descriptor.parsed_locator
+        spec = {'by': strategy, 'value': value}
+        subtree = []
+        if isinstance(descriptor, Fragment):
+            subtree, spec['children'] = _prefetch_tree(descriptor.fragment_object_cls)
+        tree.append((descriptor, subtree))
+        specs.append(spec)
+    return tree, specs
+
+
+def prefetch(container):
+    """
+    Locate the elements of all descriptors of `container`, fragments included,
+    with a single script and remember them in its webelement cache, so first
+    accesses don't look them up.  A container without a cache gets
+    `PrefetchedWebElements`, which hands each of them out once.
+
+    Only elements which are already exactly one visible element are
+    remembered, the rest are looked up when used.  Does nothing on drivers
+    which can't run scripts.
+    """
+    tree, specs = _prefetch_tree(type(container))
+    if not specs:
+        return
+    located = run_script(container.webelement, scripts.LOCATE_ALL, (specs,))
+    if located is None:
+        return
+    if container.webelement_cache is not None:
+        _remember(container.webelement_cache, container, tree, located)
+        return
+    cache = WebElementCache()
+    _remember(cache, container, tree, located)
+    container.webelement_cache = PrefetchedWebElements(cache)
+
+
+def _remember(cache, container, tree, located):
+    for (descriptor, subtree), found in zip(tree, located):
+        if found is None:
+            continue
+        webelement, children = found
+        cache.set(container, descriptor, webelement)
+        if subtree:
+            _remember(cache, descriptor.fragment_object_cls(webelement), subtree, children)
+
+
+def _read_descriptors(container, specs):
+    values = {}
+    for spec in specs:
+        value = getattr(container, spec['name'])
+        if 'children' in spec:
+            value = _read_descriptors(value, spec['children'])
+        values[spec['name']] = value
+    return values
+
+
+def _watch_specs(cls):
+    # Like `_snapshot_specs`, plus element lists, whose `rows` are the specs of
+    # their `list_object_cls`.
+    specs = []
+    for name, attr in _collect_descriptors(cls, (Element, ElementList)):
+        strategy, value = attr.parsed_locator
+        spec = {'name': name, 'locator': attr.locator, 'by': strategy, 'value': value}
+        if isinstance(attr, ElementList):
+            spec['rows'] = _watch_specs(attr.list_object_cls)
+        elif isinstance(attr, Fragment):
+            spec['children'] = _watch_specs(attr.fragment_object_cls)
+            if not spec['children']:
+                continue
+        elif attr.snapshot_property is not None:
+            spec['property'] = attr.snapshot_property
+        else:
+            continue
+        specs.append(spec)
+    return specs
+
+
+def _read_specs(webelement, specs):
+    # `scripts.READ_SPECS` with plain WebDriver commands.
+    values = {}
+    for spec in specs:
+        try:
+            if 'rows' in spec:
+                values[spec['name']] = [_read_specs(row, spec['rows'])
+                                        for row in get_elements(spec['locator'], webelement)]
+                continue
+            element = get_element(spec['locator'], webelement)
+            if 'children' in spec:
+                values[spec['name']] = _read_specs(element, spec['children'])
+            else:
+                values[spec['name']] = readers[spec['property']](element)
+        except (NoSuchElementException, MultipleElementsSelectedException,
+                StaleElementReferenceException):
+            values[spec['name']] = None
+    return values
+
+
+def watch(container, timeout=None, poll=.5):
+    """
+    Yield values of readable descriptors and element lists of `container`
+    whenever they change.
+
+    The first dict has all of them, the following ones only those which
+    changed since the previous one.  Missing elements read as `None`, element
+    lists as lists of dicts like `ListObjects.values`.  Between yields an
+    observer in the browser waits for the DOM or inputs to change and reports
+    the changed values only, so a tick costs one round trip.  Without async
+    scripts everything is read again every `poll` seconds and compared here.
+    Stops when nothing changes for `timeout` seconds, if given.
+    """
+    specs = _watch_specs(type(container))
+    if not specs:
+        raise TypeError('%s has nothing to watch.' % type(container).__name__)
+
+    def read():
+        values = run_script(container.webelement, scripts.READ_SPECS, (specs,), returns=dict)
+        if values is None:
+            values = _read_specs(container.webelement, specs)
+        return values
+
+    values = read()
+    yield dict(values)
+    changed_at = time.time()
+    script_failures = 0
+    while True:
+        wait = ASYNC_WAIT_SLICE
+        if timeout is not None:
+            wait = min(wait, changed_at + timeout - time.time())
+            if wait <= 0:
+                return
+        result = None
+        # Like in `Page.wait_for`, a failure may be a navigation.
+        if script_failures < 2:
+            result = run_script(
+                container.webelement, scripts.WATCH, (specs, values, int(wait * 1000)),
+                returns=dict, asynchronous=True)
+            script_failures = 0 if result is not None else script_failures + 1
+        if result is None:
+            time.sleep(min(poll, wait))
+            current = read()
+            changed = dict((name, value) for name, value in current.items()
+                           if value != values.get(name))
+        else:
+            changed = result['changed']
+        if changed:
+            values.update(changed)
+            changed_at = time.time()
+            yield changed
+
+
+def _fill_specs(cls, values, keystrokes):
+    descriptors = dict(iter_descriptors(cls))
+    specs = []
+    for name, value in sorted(values.items()):
+        descriptor = descriptors.get(name)
+        if descriptor is None:
+            raise TypeError('%s has no element %r.' % (cls.__name__, name))
+        strategy, locator_value = descriptor.parsed_locator
+        spec = {'name': name, 'locator': descriptor.locator, 'by': strategy,
+                'value': locator_value}
+        if isinstance(descriptor, Fragment):
+            spec['children'] = _fill_specs(descriptor.fragment_object_cls, value, keystrokes)
+        elif descriptor.fill_mode == 'keys':
+            spec['locate'] = True
+            keystrokes.append((descriptor, value))
+        elif descriptor.fill_mode == 'script':
+            spec['property'] = descriptor.snapshot_property
+            spec['fill'] = value
+        else:
+            raise TypeError("%s.%s can't be filled." % (cls.__name__, name))
+        specs.append(spec)
+    return specs
+
+
+def fill(container, values, timeout=20):
+    """
+    Set many descriptors of `container` at once; `values` maps names to values.
+
+    Nested dicts fill fragments.  A single script locates every element, writes
+    the ones with `fill_mode = 'script'` and returns the rest, which are then
+    typed into with keystrokes without further lookups.  Nothing is written
+    until all the elements are found.  Drivers which can't run scripts set the
+    descriptors one by one.
+    """
+    keystrokes = []
+    specs = _fill_specs(type(container), values, keystrokes)
+    if not specs:
+        return
+    result = _run_batch(
+        container.webelement, scripts.FILL, (specs,), timeout,
+        message="Can't get elements to fill %r" % container)
+    if result is None:
+        _write_descriptors(container, values)
+        return
+    for (descriptor, value), webelement in zip(keystrokes, result['located']):
+        descriptor.write(webelement, value)
+
+
+def _write_descriptors(container, values):
+    for name, value in sorted(values.items()):
+        if isinstance(value, dict):
+            _write_descriptors(getattr(container, name), value)
+        else:
+            setattr(container, name, value)
@@ -1,6 +1,21 @@
 from selenium.common.exceptions import (
-    NoSuchElementException, WebDriverException, TimeoutException,)
+    NoSuchElementException, WebDriverException, TimeoutException,
+    StaleElementReferenceException, NoSuchWindowException,
+    UnexpectedAlertPresentException, JavascriptException,)
 
 
 class MultipleElementsSelectedException(WebDriverException):
     pass  # TODO: docstring
+
+
+class FrozenPageException(WebDriverException):
+    """Raised on attempts to change a page inside `Page.frozen`."""
+
+
+class ReplayDivergence(AssertionError):
+    """
+    Raised when page objects issue other commands than the replayed run did.
+
+    Not a `WebDriverException`, so webel's fallbacks for drivers without
+    javascript don't swallow it.
+    """
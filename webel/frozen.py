@@ -0,0 +1,197 @@
+"""
+Read-only page objects over a copy of the DOM taken in one round trip.
+
+See `Page.frozen`.  Needs `lxml` and `cssselect` (`pip install webel[frozen]`).
+
+`FrozenDocument` stands in for the driver and `FrozenElement` for webelements.
+Neither can run scripts, so webel looks elements up with `find_elements` and
+`is_displayed`, which are answered from the copy.
+
+Visibility is approximate.  When the copy is taken by `scripts.SERIALIZE_DOM`,
+elements hidden at that moment (judged by the same rules as
+`get_visible_elements`) are marked and treated as hidden.  When only
+`page_source` is available, just `hidden` attributes, inline `display: none` /
+`visibility: hidden` styles, hidden inputs and non-rendered tags count, and
+form state is what the HTML says, not what the user typed.
+"""
+import re
+
+from webel import scripts
+from webel.exceptions import FrozenPageException, WebDriverException
+from webel.webelement_getters import run_script
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+HIDDEN_MARK = 'data-webel-hidden'
+_hidden_style_re = re.compile(r'(display\s*:\s*none|visibility\s*:\s*hidden)', re.I)
+_not_rendered_tags = frozenset(['head', 'script', 'style', 'template', 'noscript', 'title'])
+# Elements laid out as blocks by default: their text goes on lines of its own.
+_block_tags = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'caption', 'dd', 'details', 'dialog',
+    'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'summary', 'table', 'tbody', 'tfoot', 'thead', 'tr', 'ul'])
+_whitespace_re = re.compile(r'[ \t\r\n\f]+')
+
+
+def _by_attribute(node, name, value):
+    return [el for el in node.iter() if el.get(name) == value]
+
+
+class FrozenElement(object):
+
+    frozen = True
+
+    def __init__(self, document, node):
+        self.parent = document
+        self.node = node
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenElement) and self.node is other.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.node)
+
+    @property
+    def tag_name(self):
+        return self.node.tag
+
+    def find_elements(self, by, value):
+        return self.parent.find_in(self.node, by, value)
+
+    def is_displayed(self):
+        return self.parent.is_displayed(self.node)
+
+    def get_attribute(self, name):
+        if name == 'value':
+            if self.node.tag == 'textarea':
+                return self.node.text or ''
+            if self.node.tag == 'select':
+                selected = [option for option in self.node.iter('option')
+                            if option.get('selected') is not None]
+                return selected[0].get('value', selected[0].text_content()) if selected else None
+        return self.node.get(name)
+
+    def is_selected(self):
+        return (self.node.get('checked') is not None or
+                self.node.get('selected') is not None)
+
+    @property
+    def text(self):
+        return self.parent.visible_text(self.node)
+
+    def _read_only(self, *args, **kwargs):
+        raise FrozenPageException("Can't interact with a frozen page.")
+
+    click = clear = send_keys = submit = _read_only
+
+
+class FrozenDocument(object):
+
+    """A parsed copy of the DOM, answering the few driver commands webel needs."""
+
+    frozen = True
+
+    def __init__(self, html, url=None, marked=False):
+        if lxml is None:
+            raise ImportError('Frozen pages need lxml and cssselect installed.')
+        self.root = lxml.html.document_fromstring(html)
+        self.current_url = url
+        self.page_source = html
+        self.marked = marked
+
+    @classmethod
+    def from_driver(cls, driver):
+        """Copy the DOM with form state and visibility, or fall back to `page_source`."""
+        result = run_script(driver, scripts.SERIALIZE_DOM, (HIDDEN_MARK,), returns=dict)
+        if result is not None:
+            return cls(result['html'], url=result['url'], marked=True)
+        return cls(driver.page_source, url=driver.current_url)
+
+    def execute_script(self, *args):
+        raise WebDriverException('Frozen pages do not run scripts.')
+
+    execute_async_script = execute_script
+
+    def find_elements(self, by, value):
+        return self.find_in(self.root, by, value, include_root=True)
+
+    def find_in(self, node, by, value, include_root=False):
+        if by == 'css selector':
+            found = node.cssselect(value)
+        elif by == 'xpath':
+            found = [el for el in node.xpath(value) if isinstance(el, lxml.html.HtmlElement)]
+        elif by == 'id':
+            found = _by_attribute(node, 'id', value)
+        elif by == 'name':
+            found = _by_attribute(node, 'name', value)
+        elif by == 'class name':
+            found = [el for el in node.iter() if value in (el.get('class') or '').split()]
+        elif by == 'tag name':
+            found = list(node.iter(value))
+        elif by == 'link text':
+            found = [el for el in node.iter('a') if self.visible_text(el) == value]
+        else:
+            raise WebDriverException('Unknown locator strategy %r.' % by)
+        return [FrozenElement(self, el) for el in found
+                if include_root or el is not node]
+
+    def _is_hidden_itself(self, node):
+        if not isinstance(node.tag, basestring):
+            return True  # Comments and processing instructions.
+        if self.marked:
+            return node.get(HIDDEN_MARK) is not None
+        return (node.tag in _not_rendered_tags or
+                node.get('hidden') is not None or
+                (node.tag == 'input' and (node.get('type') or '').lower() == 'hidden') or
+                bool(_hidden_style_re.search(node.get('style') or '')))
+
+    def is_displayed(self, node):
+        if self.marked:
+            return not self._is_hidden_itself(node)
+        while node is not None:
+            if self._is_hidden_itself(node):
+                return False
+            node = node.getparent()
+        return True
+
+    def visible_text(self, node):
+        """
+        Return the text of `node` like selenium's `WebElement.text` does:
+        whitespace collapsed, `<br>` and block elements breaking lines.
+        """
+        if not self.is_displayed(node):
+            return ''
+        lines = ['']
+        self._collect_text(node, lines)
+        return '\n'.join(line.strip(' ') for line in lines).strip('\n').replace(u'\xa0', ' ')
+
+    def _add_text(self, text, lines):
+        text = _whitespace_re.sub(' ', text)
+        if not lines[-1] or lines[-1].endswith(' '):
+            text = text.lstrip(' ')
+        lines[-1] += text
+
+    def _collect_text(self, node, lines):
+        block = node.tag in _block_tags
+        if block and lines[-1].strip(' '):
+            lines.append('')
+        if node.tag in ('td', 'th') and lines[-1] and not lines[-1].endswith(' '):
+            lines[-1] += ' '
+        if node.text:
+            self._add_text(node.text, lines)
+        for child in node:
+            if child.tag == 'br':
+                lines.append('')
+            elif not self._is_hidden_itself(child):
+                self._collect_text(child, lines)
+            if child.tail:
+                self._add_text(child.tail, lines)
+        if block and lines[-1].strip(' '):
+            lines.append('')
@@ -0,0 +1,114 @@
+"""
+Driving pages from a thread pool, with reads and writes returning futures.
+
+    executor = Executor(max_workers=20)
+    futures = [executor.wrap(page).get('header.title') for page in pages]
+    titles = gather(futures)
+
+This is webel's counterpart of an asyncio API, which python 2 doesn't have.
+Every call runs on a worker thread with the driver of its page bound (see
+`use_driver`), so one process can drive many browsers at once, and
+independent lookups on one page overlap.  Remote drivers should use a
+`PooledConnection`, so that concurrent commands reuse sockets instead of
+opening one each.
+"""
+from multiprocessing.pool import ThreadPool
+
+import urllib3
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from webel.driver import get_driver, use_driver
+
+
+class PooledConnection(RemoteConnection):
+
+    """A connection to a remote WebDriver keeping up to `maxsize` sockets alive."""
+
+    def __init__(self, remote_server_addr, maxsize=10, resolve_ip=True):
+        super(PooledConnection, self).__init__(
+            remote_server_addr, keep_alive=True, resolve_ip=resolve_ip)
+        self._conn = urllib3.PoolManager(maxsize=maxsize, timeout=self._timeout)
+
+
+class Future(object):
+
+    """The result of a call running on an `Executor`."""
+
+    def __init__(self, async_result):
+        self._async_result = async_result
+
+    def done(self):
+        return self._async_result.ready()
+
+    def result(self, timeout=None):
+        """Wait for the call and return its result, or raise its exception."""
+        return self._async_result.get(timeout)
+
+
+def gather(futures, timeout=None):
+    """Return results of `futures`, in order."""
+    return [future.result(timeout) for future in futures]
+
+
+class Executor(object):
+
+    def __init__(self, max_workers=10):
+        self._pool = ThreadPool(max_workers)
+
+    def submit(self, driver, function, *args, **kwargs):
+        """Call `function` on a worker thread, with `driver` bound to it."""
+        def call():
+            with use_driver(driver):
+                return function(*args, **kwargs)
+        return Future(self._pool.apply_async(call))
+
+    def wrap(self, container):
+        """Return a `ConcurrentContainer` running calls on `container` here."""
+        return ConcurrentContainer(container, self)
+
+    def close(self):
+        """Wait for the submitted calls and stop the threads."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _resolve(container, name):
+    names = name.split('.')
+    for attr in names[:-1]:
+        container = getattr(container, attr)
+    return container, names[-1]
+
+
+class ConcurrentContainer(object):
+
+    """
+    A page or fragment whose descriptors are read and written on an
+    `Executor`.  Names may go through fragments: 'address.city'.
+    """
+
+    def __init__(self, container, executor):
+        self.container = container
+        self.executor = executor
+        self.driver = getattr(container, 'driver', None) or get_driver()
+
+    def call(self, function, *args, **kwargs):
+        """Return a future of `function(container, *args, **kwargs)`."""
+        return self.executor.submit(self.driver, function, self.container, *args, **kwargs)
+
+    def get(self, name):
+        return self.call(lambda container: getattr(*_resolve(container, name)))
+
+    def set(self, name, value):
+        return self.call(lambda container: setattr(*_resolve(container, name) + (value,)))
+
+    def snapshot(self, timeout=20):
+        return self.call(lambda container: container.snapshot(timeout=timeout))
+
+    def fill(self, **values):
+        return self.call(lambda container: container.fill(**values))
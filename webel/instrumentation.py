@@ -0,0 +1,178 @@
+"""
+Counting WebDriver commands, waits and time per locator and per page.
+
+    recorder = Recorder()
+    with recorder.record(driver):
+        run_the_tests()
+    print(recorder.report())
+
+`Recorder.record` wraps the driver's `execute`, which every WebDriver command
+(including webelement ones) goes through, and makes the recorder active.
+Descriptor accesses, `snapshot`, `fill` and URL waits open a scope, so the
+commands and waits they cause are attributed to their locator and to the class
+of their page or fragment.  When no recorder is active the hooks cost a global
+lookup and a function call.
+"""
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# The active `Recorder`, if any.
+recorder = None
+
+_local = threading.local()
+
+
+class Stats(object):
+
+    """
+    Numbers collected for one locator or page.  `time` is the wall time of its
+    scopes, including scopes nested in them.
+    """
+
+    fields = ('accesses', 'commands', 'wait_iterations', 'wait_time', 'browser_time',
+              'time')
+
+    def __init__(self):
+        self.accesses = self.commands = self.wait_iterations = 0
+        self.wait_time = self.browser_time = self.time = 0.0
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.locators = defaultdict(Stats)
+        self.pages = defaultdict(Stats)
+        self.commands = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def record(self, driver=None):
+        """Make this recorder active within the block, instrumenting `driver`."""
+        global recorder
+        if driver is not None:
+            instrument_driver(driver)
+        previous, recorder = recorder, self
+        try:
+            yield self
+        finally:
+            recorder = previous
+
+    def _current(self):
+        scopes = getattr(_local, 'scopes', None)
+        if scopes:
+            return [self.locators[scopes[-1][1]], self.pages[scopes[-1][0]]]
+        return [self.locators['<unscoped>'], self.pages['<unscoped>']]
+
+    @contextmanager
+    def scope(self, page, locator):
+        scopes = _local.__dict__.setdefault('scopes', [])
+        scopes.append((page, locator))
+        start = time.time()
+        try:
+            yield
+        finally:
+            scopes.pop()
+            elapsed = time.time() - start
+            with self._lock:
+                for stats in (self.locators[locator], self.pages[page]):
+                    stats.accesses += 1
+                    stats.time += elapsed
+
+    def command(self, name, seconds):
+        with self._lock:
+            self.commands[name] += 1
+            for stats in self._current():
+                stats.commands += 1
+                stats.browser_time += seconds
+
+    def wait(self, iterations, seconds):
+        with self._lock:
+            for stats in self._current():
+                stats.wait_iterations += iterations
+                stats.wait_time += seconds
+
+    def as_dict(self):
+        return {
+            'locators': dict((k, v.as_dict()) for k, v in self.locators.items()),
+            'pages': dict((k, v.as_dict()) for k, v in self.pages.items()),
+            'commands': dict(self.commands),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), sort_keys=True, **kwargs)
+
+    def slowest(self, n=10):
+        """Return the `n` locators with most time spent, as `(locator, Stats)`."""
+        return sorted(self.locators.items(), key=lambda item: -item[1].time)[:n]
+
+    def report(self, n=10):
+        lines = ['%-40s %8s %8s %8s %9s %9s' % (
+            'locator', 'accesses', 'commands', 'waits', 'wait, s', 'total, s')]
+        for locator, stats in self.slowest(n):
+            lines.append('%-40s %8d %8d %8d %9.3f %9.3f' % (
+                locator[:40], stats.accesses, stats.commands, stats.wait_iterations,
+                stats.wait_time, stats.time))
+        return '\n'.join(lines)
+
+
+def instrument_driver(driver):
+    """Report every command of `driver` to the active recorder.  Idempotent."""
+    execute = driver.execute
+    if getattr(execute, 'instrumented', False):
+        return driver
+
+    def instrumented_execute(command, params=None):
+        if recorder is None:
+            return execute(command, params)
+        start = time.time()
+        try:
+            return execute(command, params)
+        finally:
+            if recorder is not None:
+                recorder.command(command, time.time() - start)
+    instrumented_execute.instrumented = True
+    driver.execute = instrumented_execute
+    return driver
+
+
+def container_name(container):
+    return type(container).__name__
+
+
+def descriptor_access(method):
+    """Decorate `__get__`/`__set__` of descriptors to open a scope for their locator."""
+    @functools.wraps(method)
+    def wrapper(self, container, *args):
+        if recorder is None or container is None:
+            return method(self, container, *args)
+        with recorder.scope(container_name(container), self.locator):
+            return method(self, container, *args)
+    return wrapper
+
+
+def scoped(get_scope):
+    """
+    Decorate a method to run in the scope named by `get_scope(self)`, which
+    returns a `(page, locator)` pair.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if recorder is None:
+                return method(self, *args, **kwargs)
+            with recorder.scope(*get_scope(self)):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_wait(iterations, started):
+    if recorder is not None:
+        recorder.wait(iterations, time.time() - started)
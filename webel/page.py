@@ -1,13 +1,45 @@
 import re
+from contextlib import contextmanager
 from urlparse import urlunparse, urlparse
 import time
+from webel import scripts
 from webel.driver import get_driver
+from webel.frozen import FrozenDocument
+from webel.conditions import Condition, Visible
+from webel.router import router
+from webel.elements import ContainerMeta, take_snapshot, fill, watch, prefetch
+from webel.instrumentation import scoped, container_name, record_wait
 from webel.exceptions import TimeoutException
+from webel.webelement_getters import WebElementCache, ASYNC_WAIT_SLICE, run_script
+
+
+class PageMeta(ContainerMeta):
+
+    """
+    Also compiles the `url` template, so a broken one fails at import, and
+    adds classes defining a `url` to `router`.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(PageMeta, cls).__init__(name, bases, attrs)
+        cls._compile_url()
+        if 'url' in attrs:
+            router.add(cls)
+
+    def __setattr__(cls, name, value):
+        super(PageMeta, cls).__setattr__(name, value)
+        if name == 'url':
+            router.add(cls)
 
 
 class Page(object):
 
+    __metaclass__ = PageMeta
+
     url = None
+    # When true, webelements located by descriptors are remembered until they
+    # go stale or the page is navigated away from via `load` or a `Link`.
+    cache_webelements = False
 
     def __init__(self, load=None, assert_is_on_page=None, timeout=10, **kwargs):  # XXX: assert_is_on_page -> wait_for_load?
         if load is True and assert_is_on_page is True:
@@ -26,6 +58,7 @@ class Page(object):
             self.params.update(kwargs)
 
         self.driver = get_driver()
+        self.webelement_cache = WebElementCache() if self.cache_webelements else None
 
         if assert_is_on_page or (
                 not load and assert_is_on_page is None and self.url is not None):
@@ -39,27 +72,203 @@ class Page(object):
         return self.driver
 
     def load(self):
+        if self.webelement_cache is not None:
+            self.webelement_cache.clear()
         self.driver.get(self.url)
 
-    def _assert_is_on_page(self, timeout=20):
+    @scoped(lambda self: (container_name(self), '<snapshot>'))
+    def snapshot(self, timeout=20):
+        """Return values of all readable descriptors, see `elements.take_snapshot`."""
+        return take_snapshot(self, timeout=timeout)
+
+    @scoped(lambda self: (container_name(self), '<fill>'))
+    def fill(self, **values):
+        """Set many descriptors at once, see `elements.fill`."""
+        fill(self, values)
+
+    def prefetch(self):
+        """Locate all descriptors' elements at once, see `elements.prefetch`."""
+        prefetch(self)
+
+    def watch(self, timeout=None, poll=.5):
+        """
+        Yield dicts of descriptor values as they change, see `elements.watch`.
+
+            for changed in page.watch():
+                if 'status' in changed: ...
+        """
+        return watch(self, timeout=timeout, poll=poll)
+
+    @classmethod
+    def resolve_current(cls):
+        """
+        Return the page the driver is on: an instance of the subclass of `cls`
+        whose `url` matches the current URL, with its parameters taken from
+        the URL, or `None`.  Costs one read of `current_url`, see `router`.
+        """
+        page_cls, params = router.resolve(cls._clean_url(get_driver().current_url), base=cls)
+        if page_cls is None:
+            return None
+        return page_cls(assert_is_on_page=False, **params)
+
+    @scoped(lambda self: (container_name(self), '<wait_for>'))
+    def wait_for(self, any_of=(), all_of=(), timeout=20):
+        """
+        Wait until all of `all_of` and at least one of `any_of` hold, and
+        return the first of `any_of` which does (`None` without `any_of`).
+
+        Conditions are from `webel.conditions`, descriptor names stand for
+        `Visible(name)`.  An observer in the browser checks them all together
+        and reports back as soon as they hold, so the wait takes as long as the
+        outcome which happens first.  Without async scripts they are polled
+        together with plain WebDriver commands.
+        """
+        if not any_of and not all_of:
+            raise TypeError('Nothing to wait for.')
+        all_conditions = [self._condition(condition) for condition in all_of]
+        any_conditions = [self._condition(condition) for condition in any_of]
+        specs = ([condition.spec(type(self)) for condition in all_conditions],
+                 [condition.spec(type(self)) for condition in any_conditions])
+        started = time.time()
+        deadline = started + timeout
+        iterations = 0
+        script_failures = 0
+        delay = .05
+        try:
+            while True:
+                iterations += 1
+                result = None
+                # A failure may be a navigation in the middle of the wait, so
+                # give up on scripts only when they fail twice in a row.
+                if script_failures < 2:
+                    remaining = max(deadline - time.time(), 0)
+                    result = run_script(
+                        self.driver, scripts.WAIT_FOR_CONDITIONS,
+                        specs + (int(min(remaining, ASYNC_WAIT_SLICE) * 1000),),
+                        returns=dict, asynchronous=True)
+                    script_failures = 0 if result is not None else script_failures + 1
+                if result is None:
+                    result = self._check_conditions(all_conditions, any_conditions)
+                if result['met']:
+                    return None if result['won'] is None else any_of[result['won']]
+                remaining = deadline - time.time()
+                # Frozen pages (see `frozen`) never change.
+                if remaining <= 0 or getattr(self.driver, 'frozen', False) is True:
+                    break
+                if script_failures:
+                    time.sleep(min(delay, remaining))
+                    delay = min(delay * 2, .5)
+        finally:
+            record_wait(iterations, started)
+        raise TimeoutException('Timeout while waiting for all of %r and any of %r.' % (
+            all_conditions, any_conditions))
+
+    @staticmethod
+    def _condition(condition):
+        return condition if isinstance(condition, Condition) else Visible(condition)
+
+    def _check_conditions(self, all_conditions, any_conditions):
+        if not all(condition.holds(self) for condition in all_conditions):
+            return {'met': False}
+        for i, condition in enumerate(any_conditions):
+            if condition.holds(self):
+                return {'met': True, 'won': i}
+        return {'met': not any_conditions, 'won': None}
+
+    @classmethod
+    def _compile_url(cls):
         # Convert URI template into regex (not every URI template, only very
         # basic ones).
-        regex = r'^%s$' % re.sub(r'{(\w+)}', r'(?P<\1>[\w-]+)', self.url)
-
-        cleaned_url = 'UNDEFINED'
-        start = time.time()
-        while time.time() - start < timeout:
-            cleaned_url = self._clean_url(self.driver.current_url)
-            if '{' in self.url:
-                match = re.match(regex, cleaned_url)
-                if match:
-                    self.params.update(match.groupdict())
-                    return
-            else:
-                if cleaned_url == self.url:
-                    return
-            time.sleep(.1)
+        if cls.url is None:
+            regex, params = None, frozenset()
+        else:
+            regex = re.compile(r'^%s$' % re.sub(r'{(\w+)}', r'(?P<\1>[\w-]+)', cls.url))
+            params = frozenset(re.findall(r'{(\w+)}', cls.url))
+        cls._compiled_url = (cls.url, regex, params)
+        return cls._compiled_url
+
+    @classmethod
+    def _get_compiled_url(cls):
+        compiled = cls.__dict__.get('_compiled_url')
+        if compiled is None or compiled[0] != cls.url:
+            # `url` was reassigned after the class had been created.
+            compiled = cls._compile_url()
+        return compiled
+
+    @classmethod
+    def _url_regex(cls):
+        return cls._get_compiled_url()[1]
+
+    @contextmanager
+    def frozen(self):
+        """
+        Read descriptors from a copy of the DOM taken once, when entering.
+
+        Inside the block `Text`, `ReadOnlyText`, `Checkbox`, `ElementList` and
+        `Fragment` reads cost no round trips, missing elements fail at once
+        instead of being waited for, and writes raise `FrozenPageException`.
+        See `webel.frozen` for how visibility is approximated.
+        """
+        driver, cache = self.driver, self.webelement_cache
+        self.driver = FrozenDocument.from_driver(driver)
+        self.webelement_cache = None
+        try:
+            yield self
+        finally:
+            self.driver, self.webelement_cache = driver, cache
+
+    def _is_on_page(self, url):
+        cleaned_url = self._clean_url(url)
+        if '{' in self.url:
+            match = self._url_regex().match(cleaned_url)
+            if match:
+                self.params.update(match.groupdict())
+                return True
+            return False
+        return cleaned_url == self.url
+
+    @scoped(lambda self: (container_name(self), 'url=%s' % self.url))
+    def _assert_is_on_page(self, timeout=20):
+        """
+        Wait until the current URL matches `self.url`.
+
+        Between checks the browser is asked to report back as soon as the URL
+        changes (including `hashchange` and `popstate`), so the wait costs a
+        couple of round trips per navigation.  If that isn't possible (no async
+        scripts, or the document got unloaded while waiting) the URL is polled
+        with a growing delay.
+        """
+        started = time.time()
+        deadline = started + timeout
+        iterations = 0
+        use_scripts = True
+        delay = .05
+        current_url = browser_url = 'UNDEFINED'
+        while True:
+            iterations += 1
+            previous_url, current_url = current_url, self.driver.current_url
+            if self._is_on_page(current_url):
+                record_wait(iterations, started)
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if use_scripts:
+                # The browser may spell the URL differently from the driver, so
+                # once it has reported one, wait for a change from that.
+                if current_url != previous_url:
+                    browser_url = current_url
+                browser_url = run_script(
+                    self.driver, scripts.WAIT_FOR_URL_CHANGE,
+                    (browser_url, int(min(remaining, ASYNC_WAIT_SLICE) * 1000)),
+                    returns=basestring, asynchronous=True)
+                use_scripts = browser_url is not None
+            if not use_scripts:
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, .5)
 
+        record_wait(iterations, started)
+        cleaned_url = self._clean_url(current_url)
         raise TimeoutException(
             'Timeout while waiting for URL to become %r.  Current URL is: %r.' % (
                 self.url, cleaned_url))
@@ -71,8 +280,8 @@ class Page(object):
         return urlunparse(parsed)
 
     def check_kwargs(self, kwargs):
-        url_params = re.findall(r'{(\w+)}', self.__class__.url) if self.url else []
-        excess_vars = set(kwargs.keys()) - set(url_params)
+        url_params = self._get_compiled_url()[2]
+        excess_vars = set(kwargs.keys()) - url_params
         absent_vars = None  #set(url_params) - set(kwargs.keys())
         err_str = []
         if excess_vars:
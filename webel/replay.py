@@ -0,0 +1,298 @@
+"""
+Recording the commands a run sends to the driver, and replaying them without a browser.
+
+    recording = Recording(webdriver.Firefox())
+    with use_driver(recording.driver):
+        run_the_flow()
+    recording.save('flow.log')
+
+    replay = Replay.load('flow.log')
+    with replay.virtual_time(), use_driver(replay.driver):
+        run_the_flow()
+    replay.assert_finished()
+
+`Recording.driver` passes method calls and attribute reads through to the
+driver and logs each with its result or exception.  Results which aren't plain
+data (webelements, `switch_to` and the like) are wrapped the same way and
+logged by number.  `Replay.driver` answers from the log and raises
+`ReplayDivergence` as soon as the page objects issue something else.
+Attributes which weren't used at all when recording are missing on replay.
+
+The log has one JSON object per line.  Strings longer than `HASHED_LENGTH`
+passed to commands (scripts, mostly) are logged as their SHA-1.  The last
+argument of async scripts is the time to wait, which depends on the clock, so
+it isn't compared.  Commands of a run must come from a single thread.
+"""
+import __builtin__
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+
+from selenium.common import exceptions as selenium_exceptions
+
+from webel.exceptions import ReplayDivergence, WebDriverException
+
+HASHED_LENGTH = 200
+
+_plain_types = (basestring, int, long, float, bool, type(None))
+
+
+def _encode_args(value):
+    if isinstance(value, (RecordedObject, ReplayedObject)):
+        return {'$object': value._id}
+    if isinstance(value, basestring) and len(value) > HASHED_LENGTH:
+        return {'$sha1': hashlib.sha1(value.encode('utf-8')).hexdigest()}
+    if isinstance(value, _plain_types):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode_args(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, _encode_args(item)) for key, item in value.items())
+    return {'$repr': repr(value)}
+
+
+def _describe(entry):
+    if entry is None:
+        return 'the end of the log'
+    if 'get' in entry:
+        description = entry['get']
+    else:
+        args = [json.dumps(arg)[:40] for arg in entry['args']]
+        args += ['%s=%s' % (key, json.dumps(value)[:40])
+                 for key, value in sorted(entry.get('kwargs', {}).items())]
+        description = '%s(%s)' % (entry['call'], ', '.join(args))
+    return '%s of object %d' % (description, entry.get('on', 0))
+
+
+class Recording(object):
+
+    """Logs what is done with `driver`, which should be used through `self.driver`."""
+
+    def __init__(self, driver):
+        self.entries = []
+        self._objects = []
+        self._ids = {}
+        self.driver = self._wrap(driver)
+
+    def _wrap(self, obj):
+        if obj not in self._ids:
+            self._ids[obj] = len(self._objects)
+            self._objects.append(RecordedObject(self, len(self._objects), obj))
+        return self._objects[self._ids[obj]]
+
+    def _result(self, value):
+        """Return `value` with objects wrapped, and how it's logged."""
+        if isinstance(value, _plain_types):
+            return value, value
+        if isinstance(value, (list, tuple)):
+            pairs = [self._result(item) for item in value]
+            return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+        if isinstance(value, dict):
+            pairs = dict((key, self._result(item)) for key, item in value.items())
+            return (dict((key, pair[0]) for key, pair in pairs.items()),
+                    dict((key, pair[1]) for key, pair in pairs.items()))
+        proxy = self._wrap(value)
+        return proxy, {'$object': proxy._id}
+
+    def _unwrap(self, value):
+        if isinstance(value, RecordedObject):
+            return value._wrapped
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._unwrap(item) for item in value)
+        if isinstance(value, dict):
+            return dict((key, self._unwrap(item)) for key, item in value.items())
+        return value
+
+    def _run(self, entry, function):
+        if entry['on'] == 0:
+            del entry['on']
+        start = time.time()
+        try:
+            value = function()
+        except Exception as error:
+            message = error.msg if isinstance(error, WebDriverException) else str(error)
+            entry['error'] = [type(error).__name__, message]
+            raise
+        else:
+            value, entry['result'] = self._result(value)
+            return value
+        finally:
+            seconds = round(time.time() - start, 3)
+            if seconds:
+                entry['seconds'] = seconds
+            self.entries.append(entry)
+
+    def _get(self, proxy, name):
+        obj = proxy._wrapped
+        entry = {'on': proxy._id, 'get': name}
+        if isinstance(getattr(type(obj), name, None), property):
+            return self._run(entry, lambda: getattr(obj, name))
+        try:
+            attr = getattr(obj, name)
+        except AttributeError:
+            return self._run(entry, lambda: getattr(obj, name))
+        if not callable(attr):
+            return self._run(entry, lambda: attr)
+
+        def method(*args, **kwargs):
+            entry = {'on': proxy._id, 'call': name, 'args': _encode_args(args)}
+            if kwargs:
+                entry['kwargs'] = _encode_args(kwargs)
+            args, kwargs = self._unwrap(args), self._unwrap(kwargs)
+            return self._run(entry, lambda: attr(*args, **kwargs))
+        return method
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+class RecordedObject(object):
+
+    def __init__(self, recording, id, wrapped):
+        self._recording = recording
+        self._id = id
+        self._wrapped = wrapped
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self._recording._get(self, name)
+
+    def __repr__(self):
+        return '<recorded %d: %r>' % (self._id, self._wrapped)
+
+
+class Replay(object):
+
+    """Answers commands from `entries` of a `Recording`, through `self.driver`."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.position = 0
+        self._objects = {}
+        self._calls = set(entry['call'] for entry in entries if 'call' in entry)
+        self._names = self._calls | set(entry['get'] for entry in entries if 'get' in entry)
+        # Seconds skipped by `virtual_time`.
+        self._skipped = None
+        self.driver = self._object(0)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def _object(self, id):
+        if id not in self._objects:
+            self._objects[id] = ReplayedObject(self, id)
+        return self._objects[id]
+
+    def _next(self):
+        if self.position < len(self.entries):
+            return self.entries[self.position]
+        return None
+
+    def _divergence(self, entry):
+        return ReplayDivergence('Command %d: recorded %s, but got %s.' % (
+            self.position, _describe(self._next()), _describe(entry)))
+
+    def _decode(self, value):
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if isinstance(value, dict):
+            if '$object' in value:
+                return self._object(value['$object'])
+            return dict((key, self._decode(item)) for key, item in value.items())
+        return value
+
+    def _consume(self, entry):
+        self.position += 1
+        if self._skipped is not None:
+            self._skipped += entry.get('seconds', 0)
+        if 'error' in entry:
+            name, message = entry['error']
+            cls = getattr(selenium_exceptions, name, None) or getattr(__builtin__, name, None)
+            if not (isinstance(cls, type) and issubclass(cls, Exception)):
+                cls = WebDriverException
+            raise cls(message)
+        return self._decode(entry['result'])
+
+    def _get(self, proxy, name):
+        entry = self._next()
+        if entry is not None and entry.get('on', 0) == proxy._id:
+            if entry.get('get') == name:
+                return self._consume(entry)
+            if entry.get('call') == name:
+                return self._method(proxy, name)
+        if name in self._calls:
+            # Checked when called, since looking a method up isn't a command.
+            return self._method(proxy, name)
+        if name not in self._names:
+            # Nothing used it when recording: it's missing, so that probing
+            # with `getattr(obj, name, default)` or `hasattr` falls back.
+            raise AttributeError(name)
+        raise self._divergence({'on': proxy._id, 'get': name})
+
+    def _method(self, proxy, name):
+        def method(*args, **kwargs):
+            issued = {'on': proxy._id, 'call': name, 'args': _encode_args(args),
+                      'kwargs': _encode_args(kwargs)}
+            entry = self._next()
+            if not self._matches(entry, issued):
+                raise self._divergence(issued)
+            return self._consume(entry)
+        return method
+
+    def _matches(self, entry, issued):
+        if (entry is None or entry.get('on', 0) != issued['on'] or
+                entry.get('call') != issued['call'] or
+                entry.get('kwargs', {}) != issued['kwargs']):
+            return False
+        recorded, args = entry['args'], issued['args']
+        if issued['call'] == 'execute_async_script':
+            recorded, args = recorded[:-1], args[:-1]
+        return recorded == args
+
+    def assert_finished(self):
+        """Raise `ReplayDivergence` unless every recorded command was issued."""
+        if self._next() is not None:
+            raise ReplayDivergence('Command %d: recorded %s, but the run ended.' % (
+                self.position, _describe(self._next())))
+
+    @contextmanager
+    def virtual_time(self):
+        """
+        Patch `time.time` and `time.sleep` within the block: sleeps return at
+        once and replayed commands take no time, but the clock is moved on by
+        as much as they took when recorded.  Waits then poll and time out like
+        they did, only without waiting.  Affects all threads.
+        """
+        real_time, real_sleep = time.time, time.sleep
+        self._skipped = 0.0
+
+        def sleep(seconds):
+            self._skipped += max(seconds, 0)
+        time.time = lambda: real_time() + self._skipped
+        time.sleep = sleep
+        try:
+            yield self
+        finally:
+            time.time, time.sleep = real_time, real_sleep
+            self._skipped = None
+
+
+class ReplayedObject(object):
+
+    def __init__(self, replay, id):
+        self._replay = replay
+        self._id = id
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self._replay._get(self, name)
+
+    def __repr__(self):
+        return '<replayed %d>' % self._id
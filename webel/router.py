@@ -0,0 +1,90 @@
+"""
+Finding the page class for a URL, see `Page.resolve_current`.
+
+Page classes defining a `url` are added to `router` when created and again
+when their `url` is reassigned.  Templates are split on '/' into a trie:
+literal segments are looked up in dicts and templated ones (`{param}`) are
+matched by compiled regexes, so resolving a URL walks its segments instead of
+trying every page.  Literal segments win over templated ones, and of classes
+with the same template the one defined last wins.  Classes are held by weak
+references.
+"""
+import re
+import weakref
+
+
+class _Node(object):
+
+    def __init__(self):
+        self.literals = {}
+        # `(segment, regex, node)` for templated segments.
+        self.patterns = []
+        # Weak references to classes whose template ends here.
+        self.classes = []
+
+
+class Router(object):
+
+    def __init__(self):
+        self.root = _Node()
+        self._nodes = weakref.WeakKeyDictionary()
+
+    def add(self, cls):
+        """Route `cls.url` to `cls`, replacing its previous route."""
+        self.remove(cls)
+        if cls.url is None:
+            return
+        node = self.root
+        for segment in cls.url.split('/'):
+            if '{' not in segment:
+                node = node.literals.setdefault(segment, _Node())
+                continue
+            for template, regex, child in node.patterns:
+                if template == segment:
+                    node = child
+                    break
+            else:
+                # The same conversion as `Page._compile_url`, per segment.
+                regex = re.compile(r'^%s$' % re.sub(r'{(\w+)}', r'(?P<\1>[\w-]+)', segment))
+                child = _Node()
+                node.patterns.append((segment, regex, child))
+                node = child
+        node.classes = [ref for ref in node.classes if ref() is not None]
+        node.classes.append(weakref.ref(cls))
+        self._nodes[cls] = node
+
+    def remove(self, cls):
+        node = self._nodes.pop(cls, None)
+        if node is not None:
+            node.classes = [ref for ref in node.classes if ref() not in (cls, None)]
+
+    def resolve(self, url, base=object):
+        """
+        Return `(cls, params)` for a subclass of `base` whose template matches
+        `url`, which should have no query string, or `(None, {})`.
+        """
+        for cls, params in self._match(self.root, url.split('/'), 0, {}):
+            if issubclass(cls, base):
+                return cls, params
+        return None, {}
+
+    def _match(self, node, segments, i, params):
+        if i == len(segments):
+            for ref in reversed(node.classes):
+                cls = ref()
+                if cls is not None:
+                    yield cls, params
+            return
+        child = node.literals.get(segments[i])
+        if child is not None:
+            for match in self._match(child, segments, i + 1, params):
+                yield match
+        for template, regex, child in node.patterns:
+            found = regex.match(segments[i])
+            if found:
+                for match in self._match(
+                        child, segments, i + 1, dict(params, **found.groupdict())):
+                    yield match
+
+
+router = Router()
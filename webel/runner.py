@@ -0,0 +1,269 @@
+"""
+Running a unittest suite of page objects in parallel processes, balanced by
+how long each test took the last time.
+
+    python -m webel.runner --workers 8 --driver myproject.drivers:firefox myproject.tests
+
+Tests are split into one shard per worker so that the shards' expected
+durations, taken from the history file, are about equal: the longest tests are
+placed first, each on the least loaded shard.  Tests missing from the history
+count as the average of the known ones.  Every shard runs in its own process,
+which starts a driver with `--driver` (a callable, named `module:callable`),
+makes it the default with `set_driver` and quits it at the end.  Without
+`--driver` the tests are left to set up drivers themselves.  A shard runs as
+one suite, so tests of a class or module in it share their fixtures.
+
+Wall time, status and, with `--driver`, the number of WebDriver commands of
+every test are written back to the history file for the next run.
+"""
+import argparse
+import heapq
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+
+from webel.driver import set_driver
+from webel.instrumentation import Recorder
+
+HISTORY_PATH = '.webel-history.json'
+
+
+class History(object):
+
+    """
+    `{test id: {'seconds': ..., 'commands': ...}}` of the last run of every
+    test, kept in `path`.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.tests = {}
+        try:
+            with open(path) as f:
+                self.tests = json.load(f)
+        except (IOError, ValueError):
+            pass  # No history yet.
+
+    def estimate(self, test_id):
+        """Return the expected duration of `test_id`, in seconds."""
+        if test_id in self.tests:
+            return self.tests[test_id]['seconds']
+        if not self.tests:
+            return 1.0
+        return sum(test['seconds'] for test in self.tests.values()) / float(len(self.tests))
+
+    def update(self, results):
+        for result in results:
+            self.tests[result['id']] = {
+                'seconds': result['seconds'], 'commands': result['commands']}
+
+    def save(self):
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(self.tests, f, indent=1, sort_keys=True)
+        os.rename(self.path + '.tmp', self.path)
+
+
+def collect(names, loader=unittest.defaultTestLoader):
+    """Return ids of the tests in modules, classes or methods named by `names`."""
+    def flatten(suite):
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                for inner in flatten(test):
+                    yield inner
+            else:
+                yield test
+    return [test.id() for test in flatten(loader.loadTestsFromNames(names))]
+
+
+def shard(test_ids, history, workers):
+    """
+    Split `test_ids` into at most `workers` lists of about the same expected
+    duration.  Tests keep their order within a shard.
+    """
+    order = dict((test_id, i) for i, test_id in enumerate(test_ids))
+    shards = [(0.0, i, []) for i in range(min(workers, len(test_ids)))]
+    for test_id in sorted(test_ids, key=lambda test_id: -history.estimate(test_id)):
+        load, i, tests = heapq.heappop(shards)
+        tests.append(test_id)
+        heapq.heappush(shards, (load + history.estimate(test_id), i, tests))
+    return [sorted(tests, key=order.get) for load, i, tests in sorted(shards, key=lambda s: s[1])]
+
+
+def _load_callable(name):
+    module, attr = name.split(':')
+    return getattr(importlib.import_module(module), attr)
+
+
+class _TimingResult(unittest.TestResult):
+
+    """
+    Collects a result dict per test: wall time and commands are counted from
+    `startTest` to `stopTest`.
+    """
+
+    def __init__(self, recorder=None):
+        super(_TimingResult, self).__init__()
+        self.recorder = recorder
+        self.outcomes = []
+        # Result dicts of `setUpClass`, `setUpModule` and their tear downs
+        # which failed or skipped, with ids like 'setUpClass (module.Class)'.
+        self.fixture_outcomes = []
+        self._current = None
+
+    def _commands(self):
+        return sum(self.recorder.commands.values()) if self.recorder is not None else None
+
+    def startTest(self, test):
+        super(_TimingResult, self).startTest(test)
+        self._current = {'id': test.id(), 'seconds': time.time(),
+                         'commands': self._commands(), 'status': 'ok', 'details': None}
+
+    def stopTest(self, test):
+        super(_TimingResult, self).stopTest(test)
+        outcome, self._current = self._current, None
+        outcome['seconds'] = round(time.time() - outcome['seconds'], 3)
+        if self.recorder is not None:
+            outcome['commands'] = self._commands() - outcome['commands']
+        self.outcomes.append(outcome)
+
+    def _set_status(self, status, problems):
+        if self._current is None:
+            fixture, details = problems[-1]
+            self.fixture_outcomes.append({'id': fixture.id(), 'seconds': 0.0, 'commands': None,
+                                          'status': status, 'details': details})
+        elif self._current['status'] == 'ok':
+            self._current['status'], self._current['details'] = status, problems[-1][1]
+
+    def addError(self, test, err):
+        super(_TimingResult, self).addError(test, err)
+        self._set_status('error', self.errors)
+
+    def addFailure(self, test, err):
+        super(_TimingResult, self).addFailure(test, err)
+        self._set_status('failure', self.failures)
+
+    def addSkip(self, test, reason):
+        super(_TimingResult, self).addSkip(test, reason)
+        self._set_status('skipped', self.skipped)
+
+    def addExpectedFailure(self, test, err):
+        super(_TimingResult, self).addExpectedFailure(test, err)
+        self._set_status('expected failure', self.expectedFailures)
+
+    def addUnexpectedSuccess(self, test):
+        super(_TimingResult, self).addUnexpectedSuccess(test)
+        self._current['status'] = 'unexpected success'
+
+
+def _run_shard(args):
+    # Runs in a worker process.  The shard is one suite, so class and module
+    # fixtures are set up once for the tests of the shard which need them.
+    driver_factory, test_ids = args
+    suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+    driver = None
+    if driver_factory is not None:
+        driver = _load_callable(driver_factory)()
+        set_driver(driver)
+    try:
+        if driver is None:
+            result = _TimingResult()
+            suite.run(result)
+        else:
+            recorder = Recorder()
+            result = _TimingResult(recorder)
+            with recorder.record(driver):
+                suite.run(result)
+    finally:
+        if driver is not None:
+            set_driver(None)
+            driver.quit()
+    # Tests whose class or module fixture failed to set up, or skipped, don't
+    # run at all and get its result; errors of tearing fixtures down are
+    # results of their own.
+    fixtures = dict((outcome['id'], outcome) for outcome in result.fixture_outcomes)
+    ran = set(outcome['id'] for outcome in result.outcomes)
+    outcomes = result.outcomes
+    for test_id in test_ids:
+        if test_id in ran:
+            continue
+        class_name, module = test_id.rsplit('.', 1)[0], test_id.rsplit('.', 2)[0]
+        fixture = (fixtures.get('setUpClass (%s)' % class_name) or
+                   fixtures.get('setUpModule (%s)' % module) or
+                   {'status': 'error', 'details': 'Not run.'})
+        outcomes.append({'id': test_id, 'seconds': 0.0, 'commands': None,
+                         'status': fixture['status'], 'details': fixture['details']})
+    return outcomes + [outcome for outcome in result.fixture_outcomes
+                       if outcome['id'].startswith('tearDown') and outcome['status'] == 'error']
+
+
+def run(test_ids, workers, driver_factory=None, history=None):
+    """
+    Run `test_ids` on `workers` processes and return a result dict per test,
+    in the order of `test_ids`, followed by errors of tearing down class and
+    module fixtures, if any.  `driver_factory` is a `module:callable` name.
+    `history`, if given, balances the shards and is updated and saved.
+    """
+    shards = shard(test_ids, history or History(os.devnull), workers)
+    if not shards:
+        return []
+    # One process per shard, so every shard gets a fresh process and driver.
+    pool = multiprocessing.Pool(len(shards), maxtasksperchild=1)
+    try:
+        shard_results = pool.map(_run_shard, [(driver_factory, tests) for tests in shards],
+                                 chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    by_id = dict((result['id'], result) for results in shard_results for result in results)
+    results = [by_id.pop(test_id) for test_id in test_ids]
+    if history is not None:
+        history.update(results)
+        history.save()
+    return results + sorted(by_id.values(), key=lambda result: result['id'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('names', nargs='+', metavar='NAME',
+                        help='test modules, classes or methods, like for unittest')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='number of processes (default: %(default)s)')
+    parser.add_argument('--driver', metavar='MODULE:CALLABLE',
+                        help='creates the driver of a worker')
+    parser.add_argument('--history', default=HISTORY_PATH,
+                        help='where durations are kept (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    history = History(args.history)
+    test_ids = collect(args.names)
+    start = time.time()
+    results = run(test_ids, args.workers, args.driver, history)
+    seconds = time.time() - start
+
+    problems = [result for result in results if result['status'] in ('error', 'failure')]
+    for result in problems:
+        print('=' * 70)
+        print('%s: %s' % (result['status'].upper(), result['id']))
+        print('-' * 70)
+        print(result['details'])
+    print('Ran %d tests in %.3fs on %d workers (%.3fs of tests).' % (
+        len(test_ids), seconds, min(args.workers, len(test_ids)),
+        sum(result['seconds'] for result in results)))
+    counts = []
+    for status, name in [('failure', 'failures'), ('error', 'errors'),
+                         ('skipped', 'skipped'), ('expected failure', 'expected failures'),
+                         ('unexpected success', 'unexpected successes')]:
+        number = sum(1 for result in results if result['status'] == status)
+        if number:
+            counts.append('%s=%d' % (name, number))
+    print('%s%s' % ('FAILED' if problems else 'OK',
+                    ' (%s)' % ', '.join(counts) if counts else ''))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Emulation of the scripts from `webel.scripts` in python, for fake drivers.
+
+`ScriptEmulation` is mixed into a driver which keeps its own DOM; it only has
+to say how to look elements up in it and how to hand them back:
+
+    _root(root)               The element to search from, the document for None.
+    _visible(root, by, value) Displayed elements matching the locator.
+    _present(root, by, value) All elements matching the locator.
+    _wrap(elements)           Elements as returned to webel.
+    _read(element, prop)      The value of `text`, `value` or `checked`.
+    _write(element, prop, value)
+    _unsupported(script)      Called (and should raise) for unknown scripts.
+
+Async scripts also use `url` and call `on_wait`, when set, before checking.
+"""
+import re
+import time
+
+from webel import scripts
+
+
+class ScriptEmulation(object):
+
+    """Runs scripts from `webel.scripts` against a fake driver's DOM."""
+
+    on_wait = None
+
+    def emulate_script(self, script, root, args):
+        root = self._root(root)
+        if script == scripts.FIND_VISIBLE_ELEMENTS:
+            return self._wrap(self._visible(root, *args))
+        if script == scripts.COUNT_ELEMENTS:
+            return len(self._present(root, *args))
+        if script == scripts.FIND_ELEMENTS_SLICE:
+            by, value, start, stop = args
+            return self._wrap(self._present(root, by, value)[start:stop])
+        if script == scripts.FIND_PATH:
+            return self._find_path(root, args[0])
+        if script == scripts.LOCATE_ALL:
+            return self._locate_all(root, args[0])
+        if script == scripts.READ_SPECS:
+            return self._read_specs(root, args[0])
+        if script == scripts.SNAPSHOT:
+            missing = []
+            values = self._snapshot(root, args[0], missing)
+            return {'values': values, 'missing': missing}
+        if script == scripts.SNAPSHOT_ROWS:
+            by, value, start, stop, specs = args
+            missing = []
+            values = [self._snapshot(row, specs, missing)
+                      for row in self._present(root, by, value)[start:stop]]
+            return {'values': values, 'missing': missing}
+        if script == scripts.FILL:
+            missing, located, writes = [], [], []
+            self._resolve_fill(root, args[0], missing, located, writes)
+            if missing:
+                return {'missing': missing, 'located': []}
+            for element, spec in writes:
+                self._write(element, spec['property'], spec['fill'])
+            return {'missing': [], 'located': self._wrap(located)}
+        return self._unsupported(script)
+
+    def emulate_async_script(self, script, root, args):
+        # Waits check the DOM once and, if they didn't succeed, sleep out
+        # their timeout like a browser would.
+        root = self._root(root)
+        if self.on_wait is not None:
+            self.on_wait()
+        if script in (scripts.WAIT_FOR_ELEMENTS, scripts.WAIT_FOR_PRESENT_ELEMENTS):
+            by, value, mode, timeout_ms = args
+            if mode == 'visible':
+                found = self._visible(root, by, value)
+                found = self._wrap(found) if len(found) == 1 else None
+            elif mode == 'count':
+                found = len(self._present(root, by, value)) or None
+            else:
+                found = self._wrap(self._present(root, by, value)) or None
+            if found is None:
+                time.sleep(timeout_ms / 1000.)
+            return {'found': found}
+        if script == scripts.WAIT_FOR_PATH:
+            steps, timeout_ms = args
+            result = self._find_path(root, steps)
+            if result['missing']:
+                time.sleep(timeout_ms / 1000.)
+            return result
+        if script == scripts.WAIT_FOR_CONDITIONS:
+            all_of, any_of, timeout_ms = args
+            if all(self._holds(condition) for condition in all_of):
+                for i, condition in enumerate(any_of):
+                    if self._holds(condition):
+                        return {'met': True, 'won': i}
+                if not any_of:
+                    return {'met': True, 'won': None}
+            time.sleep(timeout_ms / 1000.)
+            return {'met': False}
+        if script == scripts.WATCH:
+            specs, last, timeout_ms = args
+            values = self._read_specs(root, specs)
+            changed = dict((name, value) for name, value in values.items()
+                           if value != last.get(name))
+            if not changed:
+                time.sleep(timeout_ms / 1000.)
+            return {'changed': changed}
+        if script == scripts.WAIT_FOR_URL_CHANGE:
+            url, timeout_ms = args
+            if self.url == url:
+                time.sleep(timeout_ms / 1000.)
+            return self.url
+        return self._unsupported(script)
+
+    def _one(self, root, by, value):
+        found = self._visible(root, by, value)
+        return found[0] if len(found) == 1 else None
+
+    def _find_path(self, root, steps):
+        found = []
+        for step in steps:
+            root = self._one(root, step['by'], step['value'])
+            if root is None:
+                return {'missing': [step['locator']], 'found': []}
+            found.append(root)
+        return {'missing': [], 'found': self._wrap(found)}
+
+    def _holds(self, condition):
+        if condition['state'] == 'url':
+            return re.match(condition['pattern'], self.url.split('?')[0]) is not None
+        root = self._root(None)
+        for step in condition['steps'][:-1]:
+            root = self._one(root, step['by'], step['value'])
+            if root is None:
+                return False
+        last = condition['steps'][-1]
+        if condition['state'] == 'present':
+            return bool(self._present(root, last['by'], last['value']))
+        element = self._one(root, last['by'], last['value'])
+        if element is None:
+            return False
+        return (condition['state'] == 'visible' or
+                self._read(element, condition['property']) == condition['expected'])
+
+    def _snapshot(self, root, specs, missing):
+        values = {}
+        for spec in specs:
+            element = self._one(root, spec['by'], spec['value'])
+            if element is None:
+                missing.append(spec['locator'])
+            elif 'children' in spec:
+                values[spec['name']] = self._snapshot(element, spec['children'], missing)
+            else:
+                values[spec['name']] = self._read(element, spec['property'])
+        return values
+
+    def _locate_all(self, root, specs):
+        located = []
+        for spec in specs:
+            element = self._one(root, spec['by'], spec['value'])
+            if element is None:
+                located.append(None)
+            else:
+                located.append([self._wrap([element])[0],
+                                self._locate_all(element, spec.get('children', []))])
+        return located
+
+    def _read_specs(self, root, specs):
+        values = {}
+        for spec in specs:
+            if 'rows' in spec:
+                values[spec['name']] = [self._read_specs(row, spec['rows']) for row in
+                                        self._present(root, spec['by'], spec['value'])]
+                continue
+            element = self._one(root, spec['by'], spec['value'])
+            if element is None:
+                values[spec['name']] = None
+            elif 'children' in spec:
+                values[spec['name']] = self._read_specs(element, spec['children'])
+            else:
+                values[spec['name']] = self._read(element, spec['property'])
+        return values
+
+    def _resolve_fill(self, root, specs, missing, located, writes):
+        for spec in specs:
+            element = self._one(root, spec['by'], spec['value'])
+            if element is None:
+                missing.append(spec['locator'])
+            elif 'children' in spec:
+                self._resolve_fill(element, spec['children'], missing, located, writes)
+            elif spec.get('locate'):
+                located.append(element)
+            else:
+                writes.append((element, spec))
@@ -0,0 +1,576 @@
+"""
+JavaScript snippets executed in the browser via `execute_script`.
+
+Every script starts with `HELPERS`, which defines a `webel` object with
+locator resolution and visibility checks mirroring what `webelement_getters`
+does on the python side.  Visibility is checked by the same atom as selenium's
+`is_displayed()`, which is large, so it comes in `VISIBILITY`, put before
+`HELPERS` only in scripts checking visibility (`webel.isDisplayed`, and
+`findOne`, `snapshot` and `readSpecs` using it).
+"""
+import pkgutil
+
+# The atom selenium's `WebElement.is_displayed` runs, shipped with selenium.
+IS_DISPLAYED_ATOM = pkgutil.get_data(
+    'selenium.webdriver.remote', 'isDisplayed.js').decode('utf8')
+
+VISIBILITY = 'var webelIsDisplayed = %s;\n' % IS_DISPLAYED_ATOM
+
+HELPERS = r"""
+var webel = {
+    toArray: function (collection) {
+        return Array.prototype.slice.call(collection);
+    },
+
+    find: function (root, by, value) {
+        var scope = root || document, found = [], all, i, result;
+        switch (by) {
+        case 'css selector':
+            return webel.toArray(scope.querySelectorAll(value));
+        case 'class name':
+            return webel.toArray(scope.getElementsByClassName(value));
+        case 'tag name':
+            return webel.toArray(scope.getElementsByTagName(value));
+        case 'xpath':
+            result = (scope.ownerDocument || scope).evaluate(
+                value, scope, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (i = 0; i < result.snapshotLength; i++) {
+                if (result.snapshotItem(i).nodeType === 1) {
+                    found.push(result.snapshotItem(i));
+                }
+            }
+            return found;
+        case 'id':
+        case 'name':
+            all = scope.getElementsByTagName('*');
+            for (i = 0; i < all.length; i++) {
+                if (all[i].getAttribute(by) === value) {
+                    found.push(all[i]);
+                }
+            }
+            return found;
+        case 'link text':
+            all = scope.getElementsByTagName('a');
+            for (i = 0; i < all.length; i++) {
+                if ((all[i].innerText || all[i].textContent).trim() === value) {
+                    found.push(all[i]);
+                }
+            }
+            return found;
+        }
+        throw new Error('webel: unknown locator strategy ' + by);
+    },
+
+    // Selenium's own atom, so scripts agree with `is_displayed()`.  Needs
+    // `VISIBILITY`.
+    isDisplayed: function (el) {
+        return webelIsDisplayed(el);
+    },
+
+    // Returns the only displayed element matching the locator, or null.
+    findOne: function (root, by, value) {
+        var found = webel.find(root, by, value).filter(function (el) {
+            return webel.isDisplayed(el);
+        });
+        return found.length === 1 ? found[0] : null;
+    },
+
+    // Reads what the corresponding descriptor's `__get__` would return.
+    read: function (el, property) {
+        switch (property) {
+        case 'value':
+            return el.value === undefined ? el.getAttribute('value') : el.value;
+        case 'text':
+            return (el.innerText || '').trim();
+        case 'checked':
+            return !!(el.checked || el.selected);
+        }
+        throw new Error('webel: unknown property ' + property);
+    },
+
+    // Reads `specs` (see `SNAPSHOT`) inside `root`, collecting locators
+    // which don't resolve to exactly one visible element into `missing`.
+    snapshot: function (root, specs, missing) {
+        var values = {};
+        specs.forEach(function (spec) {
+            var el = webel.findOne(root, spec.by, spec.value);
+            if (el === null) {
+                missing.push(spec.locator);
+            } else if (spec.children) {
+                values[spec.name] = webel.snapshot(el, spec.children, missing);
+            } else {
+                values[spec.name] = webel.read(el, spec.property);
+            }
+        });
+        return values;
+    },
+
+    // Sets the property like a user would and fires the usual events.
+    write: function (el, property, value) {
+        var setter;
+        if (property === 'checked') {
+            if (!!el.checked !== value) {
+                el.click();
+            }
+            return;
+        }
+        // Use the prototype's setter, so frameworks tracking the value notice.
+        setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+        if (setter && setter.set) {
+            setter.set.call(el, value);
+        } else {
+            el.value = value;
+        }
+        ['input', 'change'].forEach(function (type) {
+            el.dispatchEvent(new Event(type, {bubbles: true}));
+        });
+    },
+
+    // Like `snapshot`, but missing elements read as null and specs with
+    // `rows` (element lists) read as a list of `rows` values per element.
+    readSpecs: function (root, specs) {
+        var values = {};
+        specs.forEach(function (spec) {
+            var el;
+            if (spec.rows) {
+                values[spec.name] = webel.find(root, spec.by, spec.value).map(function (row) {
+                    return webel.readSpecs(row, spec.rows);
+                });
+                return;
+            }
+            el = webel.findOne(root, spec.by, spec.value);
+            if (el === null) {
+                values[spec.name] = null;
+            } else if (spec.children) {
+                values[spec.name] = webel.readSpecs(el, spec.children);
+            } else {
+                values[spec.name] = webel.read(el, spec.property);
+            }
+        });
+        return values;
+    },
+
+    // Deep equality of JSON-like values, regardless of key order.
+    same: function (a, b) {
+        var keys;
+        if (a === b) {
+            return true;
+        }
+        if (a === null || b === null || typeof a !== 'object' || typeof b !== 'object' ||
+                Array.isArray(a) !== Array.isArray(b)) {
+            return false;
+        }
+        keys = Object.keys(a);
+        return keys.length === Object.keys(b).length && keys.every(function (key) {
+            return b.hasOwnProperty(key) && webel.same(a[key], b[key]);
+        });
+    }
+};
+"""
+
+# arguments: root webelement (or null for the whole document), strategy, value.
+FIND_VISIBLE_ELEMENTS = VISIBILITY + HELPERS + r"""
+return webel.find(arguments[0], arguments[1], arguments[2]).filter(function (el) {
+    return webel.isDisplayed(el);
+});
+"""
+
+# arguments: root webelement (or null), list of specs, each having `name`,
+# `by`, `value` and either `property` or nested `children` specs.
+# Returns `{values: {name: value, ...}, missing: [locator, ...]}`.
+SNAPSHOT = VISIBILITY + HELPERS + r"""
+var missing = [];
+var values = webel.snapshot(arguments[0], arguments[1], missing);
+return {values: values, missing: missing};
+"""
+
+# arguments: root webelement (or null), strategy and value of the rows
+# locator, start, stop and list of specs as for `SNAPSHOT`.  Reads rows from
+# `start` up to, but not including, `stop`.
+# Returns `{values: [{name: value, ...}, ...], missing: [locator, ...]}`.
+SNAPSHOT_ROWS = VISIBILITY + HELPERS + r"""
+var missing = [], specs = arguments[5];
+var rows = webel.find(arguments[0], arguments[1], arguments[2]).slice(arguments[3], arguments[4]);
+var values = rows.map(function (row) {
+    return webel.snapshot(row, specs, missing);
+});
+return {values: values, missing: missing};
+"""
+
+# arguments: root webelement (or null), list of specs, each having `name`,
+# `locator`, `by`, `value` and either nested `children`, `locate: true` or
+# `property` and `fill` (the value to write).  Nothing is written unless all
+# the elements are found.  Returns `{missing: [locator, ...], located: [el, ...]}`
+# with the elements of `locate` specs in depth-first order.
+FILL = VISIBILITY + HELPERS + r"""
+var missing = [], located = [], writes = [];
+var resolve = function (root, specs) {
+    specs.forEach(function (spec) {
+        var el = webel.findOne(root, spec.by, spec.value);
+        if (el === null) {
+            missing.push(spec.locator);
+        } else if (spec.children) {
+            resolve(el, spec.children);
+        } else if (spec.locate) {
+            located.push(el);
+        } else {
+            writes.push({el: el, spec: spec});
+        }
+    });
+};
+resolve(arguments[0], arguments[1]);
+if (missing.length) {
+    return {missing: missing, located: []};
+}
+writes.forEach(function (write) {
+    webel.write(write.el, write.spec.property, write.spec.fill);
+});
+return {missing: [], located: located};
+"""
+
+# Async script.  arguments: root webelement (or null), strategy, value, mode
+# ('visible' for exactly one displayed element, 'present' for any, 'count' for
+# any but reporting just their number) and the number of milliseconds to wait.
+# Calls back with `{found: [el, ...]}` (or `{found: count}`) as soon as the
+# locator matches, or `{found: null}` when the time is up.  Only 'visible' needs
+# `VISIBILITY`, `WAIT_FOR_PRESENT_ELEMENTS` is the same script without it.
+_WAIT_FOR_ELEMENTS = r"""
+var root = arguments[0], by = arguments[1], value = arguments[2], mode = arguments[3];
+var callback = arguments[arguments.length - 1];
+var finished = false, observer, interval, timer;
+
+var finish = function (found) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback({found: found});
+};
+
+var check = function () {
+    var found = webel.find(root, by, value);
+    if (mode === 'visible') {
+        found = found.filter(function (el) {
+            return webel.isDisplayed(el);
+        });
+        if (found.length === 1) {
+            finish(found);
+        }
+    } else if (found.length > 0) {
+        finish(mode === 'count' ? found.length : found);
+    }
+};
+
+observer = new MutationObserver(check);
+observer.observe(root || document, {
+    childList: true, subtree: true, attributes: true, characterData: true});
+// Visibility may also change without DOM mutations (stylesheets, layout).
+interval = setInterval(check, 250);
+timer = setTimeout(function () {
+    finish(null);
+}, arguments[4]);
+check();
+"""
+
+WAIT_FOR_ELEMENTS = VISIBILITY + HELPERS + _WAIT_FOR_ELEMENTS
+WAIT_FOR_PRESENT_ELEMENTS = HELPERS + _WAIT_FOR_ELEMENTS
+
+# Async script.  arguments: null, the URL to wait away from and the number of
+# milliseconds to wait.  Calls back with the current URL once it differs, or
+# when the time is up.
+WAIT_FOR_URL_CHANGE = r"""
+var url = arguments[1], callback = arguments[arguments.length - 1];
+var finished = false, interval, timer;
+
+var finish = function () {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    window.removeEventListener('hashchange', check);
+    window.removeEventListener('popstate', check);
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback(window.location.href);
+};
+
+var check = function () {
+    if (window.location.href !== url) {
+        finish();
+    }
+};
+
+window.addEventListener('hashchange', check);
+window.addEventListener('popstate', check);
+// `history.pushState` doesn't fire any events.
+interval = setInterval(check, 50);
+timer = setTimeout(finish, arguments[2]);
+check();
+"""
+
+# arguments: root webelement (or null), list of steps, each having `locator`,
+# `by` and `value`.  Every step is looked up inside the element found by the
+# previous one and has to match exactly one visible element.  Returns
+# `{missing: [locator], found: []}` for the first step which doesn't, or
+# `{missing: [], found: [el, ...]}` with an element per step.
+FIND_PATH = VISIBILITY + HELPERS + r"""
+var root = arguments[0], steps = arguments[1], found = [], el, i;
+for (i = 0; i < steps.length; i++) {
+    el = webel.findOne(root, steps[i].by, steps[i].value);
+    if (el === null) {
+        return {missing: [steps[i].locator], found: []};
+    }
+    found.push(el);
+    root = el;
+}
+return {missing: [], found: found};
+"""
+
+# Async script.  arguments: root webelement (or null), list of steps as for
+# `FIND_PATH` and the number of milliseconds to wait.  Like `FIND_PATH`, but
+# calls back only once every step matches, or when the time is up.
+WAIT_FOR_PATH = VISIBILITY + HELPERS + r"""
+var root = arguments[0], steps = arguments[1];
+var callback = arguments[arguments.length - 1];
+var finished = false, observer, interval, timer;
+
+var find = function () {
+    var parent = root, found = [], el, i;
+    for (i = 0; i < steps.length; i++) {
+        el = webel.findOne(parent, steps[i].by, steps[i].value);
+        if (el === null) {
+            return {missing: [steps[i].locator], found: []};
+        }
+        found.push(el);
+        parent = el;
+    }
+    return {missing: [], found: found};
+};
+
+var finish = function (result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback(result);
+};
+
+var check = function () {
+    var result = find();
+    if (!result.missing.length) {
+        finish(result);
+    }
+};
+
+observer = new MutationObserver(check);
+observer.observe(root || document, {
+    childList: true, subtree: true, attributes: true, characterData: true});
+// Visibility may also change without DOM mutations (stylesheets, layout).
+interval = setInterval(check, 250);
+timer = setTimeout(function () {
+    finish(find());
+}, arguments[2]);
+check();
+"""
+
+# arguments: root webelement (or null), list of `{by, value, children}`
+# specs, `children` being specs for elements inside the element, if any.
+# Returns, for every spec, `[element, children]` when exactly one visible
+# element matches (`children` is the same kind of list), or null.  Nothing is
+# waited for.
+LOCATE_ALL = VISIBILITY + HELPERS + r"""
+var locate = function (root, specs) {
+    return specs.map(function (spec) {
+        var el = webel.findOne(root, spec.by, spec.value);
+        if (el === null) {
+            return null;
+        }
+        return [el, spec.children ? locate(el, spec.children) : []];
+    });
+};
+return locate(arguments[0], arguments[1]);
+"""
+
+# Async script.  arguments: null, list of conditions which all have to hold,
+# list of conditions at least one of which has to (unless it's empty) and the
+# number of milliseconds to wait.  A condition has a `state`: 'url' with a
+# `pattern` for the URL without the query string, or 'present', 'visible' or
+# 'text' with `steps` as for `FIND_PATH` (all but the last have to match one
+# visible element), and for 'text' the `property` and its `expected` value.
+# Calls back with `{met: true, won: index}`, `won` being the index of the first
+# of the second list which holds (or null), or `{met: false}` when the time is up.
+WAIT_FOR_CONDITIONS = VISIBILITY + HELPERS + r"""
+var allOf = arguments[1], anyOf = arguments[2];
+var callback = arguments[arguments.length - 1];
+var finished = false, observer, interval, timer;
+
+var holds = function (condition) {
+    var root = null, steps = condition.steps, last, el, i;
+    if (condition.state === 'url') {
+        return new RegExp(condition.pattern).test(
+            location.protocol + '//' + location.host + location.pathname + location.hash);
+    }
+    for (i = 0; i < steps.length - 1; i++) {
+        root = webel.findOne(root, steps[i].by, steps[i].value);
+        if (root === null) {
+            return false;
+        }
+    }
+    last = steps[steps.length - 1];
+    if (condition.state === 'present') {
+        return webel.find(root, last.by, last.value).length > 0;
+    }
+    el = webel.findOne(root, last.by, last.value);
+    if (el === null) {
+        return false;
+    }
+    return condition.state === 'visible' ||
+        webel.read(el, condition.property) === condition.expected;
+};
+
+var finish = function (result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    window.removeEventListener('hashchange', check);
+    window.removeEventListener('popstate', check);
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback(result);
+};
+
+var check = function () {
+    var won = null, i;
+    if (!allOf.every(holds)) {
+        return;
+    }
+    for (i = 0; i < anyOf.length && won === null; i++) {
+        if (holds(anyOf[i])) {
+            won = i;
+        }
+    }
+    if (won !== null || !anyOf.length) {
+        finish({met: true, won: won});
+    }
+};
+
+observer = new MutationObserver(check);
+observer.observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true});
+window.addEventListener('hashchange', check);
+window.addEventListener('popstate', check);
+// Visibility and `history.pushState` don't show up as DOM mutations.
+interval = setInterval(check, 100);
+timer = setTimeout(function () {
+    finish({met: false});
+}, arguments[3]);
+check();
+"""
+
+# arguments: root webelement (or null), list of specs as for `SNAPSHOT`, or
+# having `rows` specs instead of `property` for element lists.  Returns
+# `{name: value, ...}`, see `webel.readSpecs`.
+READ_SPECS = VISIBILITY + HELPERS + r"""
+return webel.readSpecs(arguments[0], arguments[1]);
+"""
+
+# Async script.  arguments: null, specs as for `READ_SPECS`, the values last
+# read and the number of milliseconds to wait.  Calls back with
+# `{changed: {name: value, ...}}` holding the values which differ, as soon as
+# some do, or with empty `changed` when the time is up.
+WATCH = VISIBILITY + HELPERS + r"""
+var specs = arguments[1], last = arguments[2];
+var callback = arguments[arguments.length - 1];
+var finished = false, observer, interval, timer;
+
+var finish = function (changed) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    document.removeEventListener('input', check, true);
+    document.removeEventListener('change', check, true);
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback({changed: changed});
+};
+
+var check = function () {
+    var values = webel.readSpecs(null, specs), changed = {}, any = false;
+    Object.keys(values).forEach(function (name) {
+        if (!webel.same(values[name], last[name])) {
+            changed[name] = values[name];
+            any = true;
+        }
+    });
+    if (any) {
+        finish(changed);
+    }
+};
+
+observer = new MutationObserver(check);
+observer.observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true});
+// Typing into inputs changes their values without DOM mutations.
+document.addEventListener('input', check, true);
+document.addEventListener('change', check, true);
+// Neither does visibility changing by stylesheets or layout.
+interval = setInterval(check, 250);
+timer = setTimeout(function () {
+    finish({});
+}, arguments[3]);
+check();
+"""
+
+# arguments: root webelement (or null), strategy, value.
+COUNT_ELEMENTS = HELPERS + r"""
+return webel.find(arguments[0], arguments[1], arguments[2]).length;
+"""
+
+# arguments: root webelement (or null), strategy, value, start, stop.
+# Returns matches from `start` up to, but not including, `stop`.
+FIND_ELEMENTS_SLICE = HELPERS + r"""
+return webel.find(arguments[0], arguments[1], arguments[2]).slice(arguments[3], arguments[4]);
+"""
+
+# arguments: null, name of the attribute marking hidden elements.  Returns
+# `{url: location, html: markup}` of a copy of the document, with current form
+# state written into attributes and hidden elements marked.
+SERIALIZE_DOM = VISIBILITY + HELPERS + r"""
+var mark = arguments[1];
+var live = document.documentElement, copy = live.cloneNode(true);
+var liveElements = [live].concat(webel.toArray(live.getElementsByTagName('*')));
+var copies = [copy].concat(webel.toArray(copy.getElementsByTagName('*')));
+liveElements.forEach(function (el, i) {
+    var tag = el.tagName.toLowerCase(), target = copies[i];
+    if (!webel.isDisplayed(el)) {
+        target.setAttribute(mark, '');
+    }
+    if (tag === 'input') {
+        target.setAttribute('value', el.value);
+        if (el.checked) {
+            target.setAttribute('checked', '');
+        } else {
+            target.removeAttribute('checked');
+        }
+    } else if (tag === 'textarea') {
+        target.textContent = el.value;
+    } else if (tag === 'option') {
+        if (el.selected) {
+            target.setAttribute('selected', '');
+        } else {
+            target.removeAttribute('selected');
+        }
+    }
+});
+return {url: window.location.href, html: copy.outerHTML};
+"""
@@ -0,0 +1,117 @@
+"""
+Reusing a remote browser session across test processes.
+
+    sessions = SessionManager('.webel-session.json', 'http://127.0.0.1:4444/wd/hub',
+                              DesiredCapabilities.FIREFOX)
+    set_driver(sessions.connect())
+
+The first process starts a session and saves its id and the executor URL to
+the state file.  Later processes reattach to it, after checking it still
+answers, instead of starting a browser, and start a new one when it doesn't.
+The session outlives the processes until `SessionManager.quit`.  It should be
+used by one process at a time; the state file is locked while connecting so
+processes starting together don't create a session each.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from webel.driver import reset_driver
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No locking on Windows.
+
+
+class AttachedDriver(RemoteWebDriver):
+
+    """A remote driver taking over an existing session instead of starting one."""
+
+    def __init__(self, command_executor, session_id, capabilities, w3c):
+        self._session = (session_id, capabilities, w3c)
+        super(AttachedDriver, self).__init__(command_executor, desired_capabilities={})
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.session_id, self.capabilities, self.w3c = self._session
+        self.command_executor.w3c = self.w3c
+
+
+class SessionManager(object):
+
+    """
+    Keeps the session of a remote WebDriver at `command_executor` in
+    `state_path`.  Reattached sessions are reset with `reset`
+    (`reset_driver` by default), if given.
+    """
+
+    def __init__(self, state_path, command_executor, desired_capabilities,
+                 reset=reset_driver):
+        self.state_path = state_path
+        self.command_executor = command_executor
+        self.desired_capabilities = desired_capabilities
+        self.reset = reset
+        # Whether `connect` reused a saved session.
+        self.reattached = False
+
+    def connect(self):
+        """Return a driver for the saved session if it's alive, or for a new one."""
+        with self._locked():
+            driver = self._attach()
+            self.reattached = driver is not None
+            if driver is None:
+                driver = RemoteWebDriver(self.command_executor, self.desired_capabilities)
+                self._save(driver)
+        if self.reattached and self.reset is not None:
+            self.reset(driver)
+        return driver
+
+    def quit(self):
+        """Quit the saved session, if it's alive, and forget it."""
+        with self._locked():
+            driver = self._attach()
+            if driver is not None:
+                driver.quit()
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+
+    def _attach(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if state.get('executor') != self.command_executor:
+            return None
+        try:
+            driver = AttachedDriver(self.command_executor, state['session_id'],
+                                    state['capabilities'], state['w3c'])
+            driver.current_url  # Fails if the session or the server is gone.
+        except Exception:
+            return None
+        return driver
+
+    def _save(self, driver):
+        state = {
+            'executor': self.command_executor,
+            'session_id': driver.session_id,
+            'capabilities': driver.capabilities,
+            'w3c': driver.w3c,
+        }
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.rename(self.state_path + '.tmp', self.state_path)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.state_path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,184 @@
+"""
+Driving several pages in the windows (tabs) of one browser.
+
+    tabs = Tabs(driver)
+    alice, bob = tabs.open(), tabs.open()
+    with use_driver(alice):
+        alice_page = InboxPage(load=True)
+    with use_driver(bob):
+        bob_page = InboxPage(load=True)
+    alice_page.compose.fill(to='bob', body='Hi')  # Runs in alice's tab.
+    bob_page.messages[0]                          # Switches to bob's tab.
+
+A `Tab` stands for the driver in one window.  Pages created with it bound,
+and everything they find, send their commands to that window: `Tabs` hooks the
+driver's `execute` and switches windows right before a command which needs a
+different one, so consecutive accesses to one page cost no switches.
+Webelements are made of a class of the window they were found in, so commands
+on them, or scripts getting them as arguments, go to that window.
+
+`Tabs.run` interleaves flows of several tabs, ordering their steps so that
+the browser switches windows as rarely as possible.  The driver should only
+be used from one thread.
+"""
+from contextlib import contextmanager
+
+from selenium.webdriver.remote.command import Command
+
+from webel.driver import use_driver
+
+SCRIPT_COMMANDS = frozenset([
+    Command.EXECUTE_SCRIPT, Command.EXECUTE_ASYNC_SCRIPT,
+    Command.W3C_EXECUTE_SCRIPT, Command.W3C_EXECUTE_SCRIPT_ASYNC])
+
+
+class TabWebElement(object):
+
+    """
+    Mixed into the driver's webelement class, one subclass per window, so
+    webelements know their window without `Tabs` keeping track of each.
+    """
+
+    tabs = None
+    window_handle = None
+
+    def _execute(self, command, params=None):
+        with self.tabs.wanted(self.window_handle):
+            return super(TabWebElement, self)._execute(command, params)
+
+
+def _script_element_handles(value):
+    """Yield windows of the webelements among script arguments `value`, nested or not."""
+    if isinstance(value, TabWebElement):
+        yield value.window_handle
+    elif isinstance(value, dict):
+        for item in value.values():
+            for handle in _script_element_handles(item):
+                yield handle
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            for handle in _script_element_handles(item):
+                yield handle
+
+
+class Tabs(object):
+
+    """Multiplexes windows of `driver`, which it hooks into."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        # The window the browser is on, `None` after it's closed.
+        self.current = driver.current_window_handle
+        # Number of switches done to run commands.
+        self.switches = 0
+        self._wanted = None
+        self._element_classes = {}
+        self._tabs = {}
+        execute = driver.execute
+
+        def tabbed_execute(command, params=None):
+            if command == Command.SWITCH_TO_WINDOW:
+                response = execute(command, params)
+                self.current = params.get('handle', params.get('name'))
+                return response
+            handle = self._wanted
+            if command in SCRIPT_COMMANDS:
+                # Scripts run in the window of the webelements passed to them.
+                handle = next(_script_element_handles((params or {}).get('args')), handle)
+            if handle is not None and handle != self.current:
+                self.switches += 1
+                driver.switch_to.window(handle)
+            response = execute(command, params)
+            if command == Command.CLOSE:
+                self.current = None
+            return response
+
+        def tabbed_create_web_element(element_id):
+            # Called while unwrapping the response, so still on the same window.
+            return self._element_class(self.current)(driver, element_id, w3c=driver.w3c)
+
+        driver.execute = tabbed_execute
+        driver.create_web_element = tabbed_create_web_element
+
+    def _element_class(self, handle):
+        if handle not in self._element_classes:
+            self._element_classes[handle] = type(
+                'TabWebElement', (TabWebElement, self.driver._web_element_cls),
+                {'tabs': self, 'window_handle': handle})
+        return self._element_classes[handle]
+
+    def tab(self, handle=None):
+        """Return the `Tab` of window `handle`, by default the current one."""
+        handle = self.current if handle is None else handle
+        if handle not in self._tabs:
+            self._tabs[handle] = Tab(self, handle)
+        return self._tabs[handle]
+
+    def open(self):
+        """Open a blank window and return its `Tab`."""
+        handles = set(self.driver.window_handles)
+        self.driver.execute_script('window.open("about:blank");')
+        [handle] = set(self.driver.window_handles) - handles
+        return self.tab(handle)
+
+    def close(self, tab):
+        with self.wanted(tab.handle):
+            self.driver.close()
+        self._tabs.pop(tab.handle, None)
+        self._element_classes.pop(tab.handle, None)
+
+    @contextmanager
+    def wanted(self, handle):
+        """Within the block, driver commands go to window `handle`."""
+        previous, self._wanted = self._wanted, handle
+        try:
+            yield
+        finally:
+            self._wanted = previous
+
+    def run(self, flows):
+        """
+        Run `flows`, pairs of a `Tab` and a generator, until they finish.
+
+        Each step of a generator (up to its next `yield`) runs with its tab
+        bound by `use_driver`.  Every round gives each flow a step; steps of
+        the same tab run together, the tab the browser is on first, so a
+        round switches windows at most once per tab.
+        """
+        flows = list(flows)
+        while flows:
+            flows.sort(key=lambda flow: (flow[0].handle != self.current, flow[0].handle))
+            for tab, flow in list(flows):
+                with use_driver(tab):
+                    try:
+                        next(flow)
+                    except StopIteration:
+                        flows.remove((tab, flow))
+
+
+class Tab(object):
+
+    """The driver of one window of `tabs`, to be bound with `use_driver`."""
+
+    def __init__(self, tabs, handle):
+        self.tabs = tabs
+        self.handle = handle
+
+    def __repr__(self):
+        return '<Tab %s>' % self.handle
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        with self.tabs.wanted(self.handle):
+            attr = getattr(self.tabs.driver, name)
+        if not callable(attr):
+            return attr
+
+        def method(*args, **kwargs):
+            with self.tabs.wanted(self.handle):
+                return attr(*args, **kwargs)
+        return method
+
+    def close(self):
+        self.tabs.close(self)
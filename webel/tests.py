@@ -1,15 +1,313 @@
+import gc
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
 from mock import Mock
 from unittest import TestCase, skip
 from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 
+from webel import scripts
 from webel.exceptions import (
-    NoSuchElementException, MultipleElementsSelectedException, TimeoutException,)
-from webel.driver import set_driver
-from webel.webelement_getters import parse_locator, get_element, get_elements
+    NoSuchElementException, MultipleElementsSelectedException, TimeoutException,
+    WebDriverException, StaleElementReferenceException, FrozenPageException,
+    ReplayDivergence)
+from webel.driver import set_driver, get_driver, use_driver, DriverPool
+from webel.instrumentation import Recorder
+from webel.webelement_getters import (
+    parse_locator, compile_locator, get_element, get_elements, get_visible_elements,
+    wait_for_element, wait_for_elements, get_elements_slice, run_script, SCRIPTLESS_AFTER)
 from webel.elements import (
     Element, Text, ReadOnlyText, Checkbox, Link, FragmentObject, Fragment,
-    ElementList)
+    ElementList, fill, take_snapshot)
 from webel.page import Page
+from webel.frozen import FrozenDocument
+from webel.replay import Recording, Replay
+from webel.conditions import Present, Visible, TextEquals, URLMatches
+from webel.router import router
+from webel.session import SessionManager
+from webel.futures import Executor, PooledConnection, gather
+from webel.runner import History, collect, shard, run
+from webel.script_emulation import ScriptEmulation
+from webel.tabs import Tabs
+
+
+class FakeContainer(object):
+
+    """Holds `FakeWebElement`s, keyed by `(by, value)` pairs."""
+
+    def add_elements(self, by, selector, displayed, **properties):
+        elements = [FakeWebElement(self.driver, d, **properties) for d in displayed]
+        self.elements[(by, selector)] = elements
+        return elements
+
+    def find_elements(self, by, value):
+        self.driver.execute('find_elements')
+        if getattr(self, 'stale', False):
+            raise StaleElementReferenceException('element is not attached to the page')
+        return list(self.elements.get((by, value), []))
+
+    def find_visible(self, by, value):
+        return [el for el in self.elements.get((by, value), []) if el.displayed]
+
+
+class FakeWebElement(FakeContainer):
+
+    def __init__(self, driver, displayed=True, value=None, text='', checked=False):
+        self.parent = self.driver = driver
+        self.displayed = displayed
+        self.value = value
+        self.text_ = text
+        self.checked = checked
+        self.elements = {}
+        # Set when the element is removed from the page.
+        self.stale = False
+
+    def execute(self, command):
+        self.driver.execute(command)
+        if self.stale:
+            raise StaleElementReferenceException('element is not attached to the page')
+
+    def is_displayed(self):
+        self.execute('is_displayed')
+        return self.displayed
+
+    def get_attribute(self, name):
+        self.execute('get_attribute')
+        return self.value
+
+    @property
+    def text(self):
+        self.execute('text')
+        return self.text_
+
+    def is_selected(self):
+        self.execute('is_selected')
+        return self.checked
+
+    def clear(self):
+        self.execute('clear')
+        self.value = ''
+
+    def click(self):
+        self.execute('click')
+        self.checked = not self.checked
+
+    def send_keys(self, keys):
+        self.execute('send_keys')
+        self.value = (self.value or '') + keys
+
+    def read(self, prop):
+        return {'value': self.value, 'text': self.text_, 'checked': self.checked}[prop]
+
+    def write(self, prop, value):
+        if prop == 'checked':
+            self.checked = value
+        else:
+            self.value = value
+
+
+class FakeDriver(ScriptEmulation, FakeContainer):
+
+    """
+    A driver that records every command sent to it.
+
+    Scripts from `webel.scripts` are run by `ScriptEmulation`, unless
+    `scripts_enabled` is false, in which case `execute_script` fails like on a
+    driver without javascript support.
+    """
+
+    def __init__(self, scripts_enabled=True):
+        self.driver = self
+        self.elements = {}
+        self.scripts_enabled = scripts_enabled
+        self.commands = []
+        # Called when an async wait starts, to change the DOM while waiting.
+        self.on_wait = None
+        self.url = 'about:blank'
+
+    def execute(self, command, params=None):
+        # Every command goes through here, like with selenium's drivers.
+        self.commands.append(command)
+
+    @property
+    def current_url(self):
+        self.execute('current_url')
+        return self.url
+
+    def execute_async_script(self, script, root, *args):
+        self.execute('execute_async_script')
+        if not self.scripts_enabled:
+            raise WebDriverException('javascript is not supported')
+        if getattr(root, 'stale', False):
+            raise StaleElementReferenceException('element is not attached to the page')
+        return self.emulate_async_script(script, root, args)
+
+    def execute_script(self, script, root, *args):
+        self.execute('execute_script')
+        if not self.scripts_enabled:
+            raise WebDriverException('javascript is not supported')
+        if getattr(root, 'stale', False):
+            raise StaleElementReferenceException('element is not attached to the page')
+        return self.emulate_script(script, root, args)
+
+    def _root(self, root):
+        return root or self
+
+    def _visible(self, root, by, value):
+        return root.find_visible(by, value)
+
+    def _present(self, root, by, value):
+        return root.elements.get((by, value), [])
+
+    def _wrap(self, elements):
+        return elements
+
+    def _read(self, element, prop):
+        return element.read(prop)
+
+    def _write(self, element, prop, value):
+        element.write(prop, value)
+
+    def _unsupported(self, script):
+        raise AssertionError('Unexpected script: %r' % script)
+
+
+class FakeWebDriverServer(object):
+
+    """
+    Serves a few W3C WebDriver endpoints on localhost: sessions are created
+    and deleted, remember their URL and accept any other command.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.created = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.getheader('content-length') or 0))
+                self.respond(json.loads(body or '{}'))
+
+            def do_GET(self):
+                self.respond(None)
+
+            def do_DELETE(self):
+                self.respond(None)
+
+            def respond(self, params):
+                status, value = server.handle(self.command, self.path.split('/')[1:], params)
+                body = json.dumps({'value': value})
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self.httpd.server_port
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(.01,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def handle(self, method, path, params):
+        if path == ['session']:
+            self.created += 1
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = 'about:blank'
+            return 200, {'sessionId': session_id, 'capabilities': {'browserName': 'fake'}}
+        session_id = path[1]
+        if session_id not in self.sessions:
+            return 404, {'error': 'invalid session id', 'message': 'No such session',
+                         'stacktrace': ''}
+        if len(path) == 2 and method == 'DELETE':
+            del self.sessions[session_id]
+        elif path[2:] == ['url'] and method == 'POST':
+            self.sessions[session_id] = params['url']
+        elif path[2:] == ['url']:
+            return 200, self.sessions[session_id]
+        return 200, None
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeWindowsExecutor(object):
+
+    """
+    A command executor for selenium's remote driver, with windows holding
+    texts of elements by id (a list of texts for several elements); elements
+    found inside others are looked up in the whole window too.  Scripts
+    fail, except for opening a window and `TEXT_SCRIPT`, which returns the
+    text of the elements passed to it.
+    """
+
+    TEXT_SCRIPT = 'return arguments[0].map(function (el) { return el.textContent; });'
+
+
+    def __init__(self):
+        self.windows = {'w0': {}}
+        self.current = 'w0'
+        self.commands = []
+
+    def execute(self, command, params):
+        self.commands.append(command)
+        value = None
+        if command == Command.NEW_SESSION:
+            return {'status': 0, 'sessionId': 'fake', 'value': {}}
+        elif command == Command.GET_CURRENT_WINDOW_HANDLE:
+            value = self.current
+        elif command == Command.GET_WINDOW_HANDLES:
+            value = sorted(self.windows)
+        elif command == Command.SWITCH_TO_WINDOW:
+            self.current = params['name']
+        elif command == Command.CLOSE:
+            del self.windows[self.current]
+        elif command == Command.EXECUTE_SCRIPT and params['script'] == 'window.open("about:blank");':
+            self.windows['w%d' % len(self.windows)] = {}
+        elif command == Command.EXECUTE_SCRIPT and params['script'] == self.TEXT_SCRIPT:
+            value = []
+            for element in params['args'][0]:
+                window, name, i = element['ELEMENT'].split('/')
+                if window != self.current:
+                    return {'status': 10, 'value': {'message': 'stale element reference'}}
+                texts = self.windows[window][name]
+                texts = [texts] if isinstance(texts, basestring) else texts
+                value.append(texts[int(i)])
+        elif command in (Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENTS):
+            texts = self.windows[self.current].get(params['value'], [])
+            texts = [texts] if isinstance(texts, basestring) else texts
+            value = [{'ELEMENT': '%s/%s/%d' % (self.current, params['value'], i)}
+                     for i in range(len(texts))]
+        elif command in (Command.GET_ELEMENT_TEXT, Command.IS_ELEMENT_DISPLAYED):
+            window, name, i = params['id'].split('/')
+            if window != self.current:
+                return {'status': 10, 'value': {'message': 'stale element reference'}}
+            texts = self.windows[window][name]
+            texts = [texts] if isinstance(texts, basestring) else texts
+            value = texts[int(i)] if command == Command.GET_ELEMENT_TEXT else True
+        else:
+            return {'status': 17, 'value': {'message': 'unsupported: %s' % command}}
+        return {'status': 0, 'value': value}
 
 
 class ParseLocatorTests(TestCase):
@@ -21,6 +319,58 @@ class ParseLocatorTests(TestCase):
     def test_parse_locator_default(self):
         self.assertEqual(parse_locator("id_whatever"), (By.CSS_SELECTOR, "id_whatever"))
 
+    def test_compile_locator(self):
+        self.assertEqual(compile_locator('css=input[name=q]'),
+                         (By.CSS_SELECTOR, 'input[name=q]'))
+        self.assertEqual(compile_locator('input[name=q]'), (By.CSS_SELECTOR, 'input[name=q]'))
+        with self.assertRaises(ValueError):
+            compile_locator('xpth=//div')
+        with self.assertRaises(ValueError):
+            compile_locator('id=')
+        with self.assertRaises(TypeError):
+            compile_locator(None)
+
+
+class ClassCompilationTests(TestCase):
+
+    def test_locators_are_checked_when_class_is_defined(self):
+        with self.assertRaises(ValueError):
+            class TestPage(Page):
+                text = Text('xpth=//input')
+
+    def test_descriptors_are_parsed_and_collected(self):
+        class TestFragmentObject(FragmentObject):
+            text = Text('id=text')
+            title = ReadOnlyText('id=title')
+
+        class SubFragmentObject(TestFragmentObject):
+            text = Text('name=text')
+
+        self.assertEqual(TestFragmentObject.__dict__['text'].parsed_locator, (By.ID, 'text'))
+        self.assertEqual([name for name, _ in SubFragmentObject._descriptors],
+                         ['text', 'title'])
+        self.assertIs(SubFragmentObject._descriptors[0][1], SubFragmentObject.__dict__['text'])
+
+        # Also when assigned later, including to a base class.
+        TestFragmentObject.link = Link('id=link')
+        self.assertEqual([name for name, _ in SubFragmentObject._descriptors],
+                         ['text', 'link', 'title'])
+        del TestFragmentObject.title
+        self.assertEqual([name for name, _ in SubFragmentObject._descriptors], ['text', 'link'])
+        # And when replaced by something else, or shadowed in a subclass.
+        TestFragmentObject.link = None
+        self.assertEqual([name for name, _ in SubFragmentObject._descriptors], ['text'])
+        SubFragmentObject.text = 'not a descriptor'
+        self.assertEqual(SubFragmentObject._descriptors, ())
+
+    def test_url_template_is_compiled_when_class_is_defined(self):
+        class TestPage(Page):
+            url = 'http://example.org/{course}/{lesson}/'
+        self.assertEqual(TestPage._compiled_url[2], frozenset(['course', 'lesson']))
+        with self.assertRaises(Exception):
+            class BrokenPage(Page):
+                url = 'http://example.org/{course}/{course}/'
+
 
 class GettingElementsTests(TestCase):
 
@@ -57,6 +407,330 @@ class GettingElementsTests(TestCase):
             get_element('whatever', container=container)
 
 
+class VisibleElementsTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.elements = self.driver.add_elements(
+            By.CSS_SELECTOR, 'li', [False] * 199 + [True])
+
+    def test_single_round_trip(self):
+        self.assertEqual(get_element('li', container=self.driver), self.elements[-1])
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.assertEqual(get_element('li', container=self.driver), self.elements[-1])
+        self.assertEqual(self.driver.commands,
+                         ['execute_script', 'find_elements'] + ['is_displayed'] * 200)
+
+    def test_scriptless_drivers_are_remembered(self):
+        self.driver.scripts_enabled = False
+        for i in range(5):
+            get_visible_elements('li', self.driver)
+        self.assertEqual(self.driver.commands.count('execute_script'), SCRIPTLESS_AFTER)
+
+    def test_occasional_failures_are_not_remembered(self):
+        def lost_context(script, root, *args):
+            raise WebDriverException('unknown error: Cannot find context with specified id')
+        for attempt in range(2):
+            self.driver.execute_script = lost_context
+            for i in range(SCRIPTLESS_AFTER - 1):
+                self.assertIsNone(run_script(
+                    self.driver, scripts.FIND_VISIBLE_ELEMENTS, (By.CSS_SELECTOR, 'li')))
+            del self.driver.execute_script
+            self.assertEqual(get_element('li', container=self.driver), self.elements[-1])
+        self.assertEqual(self.driver.commands, ['execute_script'] * 2)
+
+    def test_transient_failures_are_not_remembered(self):
+        def stale(script, root, *args):
+            raise StaleElementReferenceException('gone')
+        self.driver.execute_script = stale
+        self.assertIsNone(
+            run_script(self.driver, scripts.FIND_VISIBLE_ELEMENTS, (By.CSS_SELECTOR, 'li')))
+        del self.driver.execute_script
+        self.assertEqual(get_element('li', container=self.driver), self.elements[-1])
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_raises_when_nothing_is_visible(self):
+        self.elements[-1].displayed = False
+        for scripts_enabled in (True, False):
+            self.driver.scripts_enabled = scripts_enabled
+            with self.assertRaises(NoSuchElementException):
+                get_element('li', container=self.driver)
+
+    def test_raises_when_several_are_visible(self):
+        self.elements[0].displayed = True
+        for scripts_enabled in (True, False):
+            self.driver.scripts_enabled = scripts_enabled
+            with self.assertRaises(MultipleElementsSelectedException):
+                get_element('li', container=self.driver)
+
+    def test_only_scripts_checking_visibility_carry_the_atom(self):
+        checks = re.compile(r'webel\.(isDisplayed|findOne|snapshot|readSpecs)\(')
+        for name, script in vars(scripts).items():
+            if (not name.isupper() or name.startswith('_') or not isinstance(script, basestring) or
+                    name in ('VISIBILITY', 'WAIT_FOR_PRESENT_ELEMENTS')):
+                continue
+            body = script.replace(scripts.VISIBILITY, '').replace(scripts.HELPERS, '')
+            self.assertEqual(script.startswith(scripts.VISIBILITY),
+                             checks.search(body) is not None, name)
+        # Waits in other modes than 'visible' never check visibility.
+        self.assertNotIn(scripts.VISIBILITY, scripts.WAIT_FOR_PRESENT_ELEMENTS)
+        self.assertLess(len(scripts.COUNT_ELEMENTS), 10000)
+
+    def test_get_visible_elements_in_a_container(self):
+        container = FakeWebElement(self.driver)
+        elements = container.add_elements(By.CSS_SELECTOR, 'li', [True, False])
+        self.assertEqual(get_visible_elements('li', container=container), elements[:1])
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+
+class WaitingTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.driver.on_wait = lambda: self.driver.add_elements(By.ID, 'late', [True])
+
+    def test_element_is_returned_immediately(self):
+        [element] = self.driver.add_elements(By.ID, 'early', [True])
+        self.assertIs(wait_for_element('id=early', self.driver), element)
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_waiting_is_done_in_the_browser(self):
+        element = wait_for_element('id=late', self.driver)
+        self.assertIs(element, self.driver.elements[(By.ID, 'late')][0])
+        self.assertEqual(self.driver.commands, ['execute_script', 'execute_async_script'])
+
+    def test_waiting_for_elements(self):
+        elements = wait_for_elements('id=late', self.driver)
+        self.assertEqual(elements, self.driver.elements[(By.ID, 'late')])
+        self.assertEqual(self.driver.commands, ['find_elements', 'execute_async_script'])
+
+    def test_timeout(self):
+        self.driver.on_wait = None
+        with self.assertRaises(TimeoutException):
+            wait_for_element('id=late', self.driver, timeout=.1)
+
+    def test_polling_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.driver.on_wait = None
+        for i in range(SCRIPTLESS_AFTER):
+            with self.assertRaises(TimeoutException):
+                wait_for_element('id=late', self.driver, timeout=.1)
+        # Once scripts failed a few times, they aren't tried again on this driver.
+        self.assertEqual(self.driver.commands.count('execute_script'), SCRIPTLESS_AFTER)
+        self.assertLess(self.driver.commands.count('execute_async_script'), SCRIPTLESS_AFTER)
+
+    def test_descriptor_timeouts(self):
+        self.assertEqual(Text('id=text').timeout, 20)
+        self.assertEqual(Text('id=text', timeout=3).timeout, 3)
+        self.assertEqual(ElementList('li', FragmentObject).timeout, 10)
+        self.assertEqual(ElementList('li', FragmentObject, timeout=3).timeout, 3)
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        self.driver.add_elements(By.ID, 'name', [True], value='John')
+        self.driver.add_elements(By.ID, 'title', [True], text='Profile')
+        self.driver.add_elements(By.ID, 'agree', [True], checked=True)
+        [address] = self.driver.add_elements(By.ID, 'address', [True])
+        address.add_elements(By.NAME, 'city', [True], value='Kyiv')
+
+        class AddressFragment(FragmentObject):
+            city = Text('name=city')
+
+        class TestPage(Page):
+            name = Text('id=name')
+            title = ReadOnlyText('id=title')
+            agree = Checkbox('id=agree')
+            address = Fragment('id=address', AddressFragment)
+            link = Link('id=link')
+        self.page = TestPage()
+        self.expected = {
+            'name': 'John', 'title': 'Profile', 'agree': True,
+            'address': {'city': 'Kyiv'},
+        }
+
+    def test_snapshot_is_one_round_trip(self):
+        self.assertEqual(self.page.snapshot(), self.expected)
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_fragment_snapshot(self):
+        self.assertEqual(self.page.address.snapshot(), {'city': 'Kyiv'})
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.assertEqual(self.page.snapshot(), self.expected)
+
+    def test_raises_when_element_is_missing(self):
+        del self.driver.elements[(By.ID, 'title')]
+        with self.assertRaises(TimeoutException):
+            self.page.snapshot(timeout=.1)
+
+
+class FillTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        [self.name] = self.driver.add_elements(By.ID, 'name', [True], value='')
+        [self.login] = self.driver.add_elements(By.ID, 'login', [True], value='')
+        [self.agree] = self.driver.add_elements(By.ID, 'agree', [True])
+        self.driver.add_elements(By.ID, 'title', [True])
+        [address] = self.driver.add_elements(By.ID, 'address', [True])
+        [self.city] = address.add_elements(By.NAME, 'city', [True], value='')
+
+        class AddressFragment(FragmentObject):
+            city = Text('name=city')
+
+        class TestPage(Page):
+            name = Text('id=name')
+            login = Text('id=login', fill_mode='keys')
+            agree = Checkbox('id=agree')
+            title = ReadOnlyText('id=title')
+            address = Fragment('id=address', AddressFragment)
+        self.page = TestPage()
+
+    def test_fill_with_script(self):
+        self.page.fill(name='John', agree=True, address={'city': 'Kyiv'})
+        self.assertEqual(self.driver.commands, ['execute_script'])
+        self.assertEqual(self.name.value, 'John')
+        self.assertEqual(self.city.value, 'Kyiv')
+        self.assertTrue(self.agree.checked)
+
+    def test_fill_with_keystrokes_reuses_located_elements(self):
+        self.page.fill(name='John', login='john')
+        self.assertEqual(self.driver.commands,
+                         ['execute_script', 'clear', 'click', 'send_keys'])
+        self.assertEqual(self.login.value, 'john')
+
+    def test_fill_fragment(self):
+        self.page.address.fill(city='Kyiv')
+        self.assertEqual(self.city.value, 'Kyiv')
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.page.fill(name='John', login='john', agree=True, address={'city': 'Kyiv'})
+        self.assertEqual(
+            (self.name.value, self.login.value, self.agree.checked, self.city.value),
+            ('John', 'john', True, 'Kyiv'))
+
+    def test_nothing_is_written_until_everything_is_found(self):
+        del self.driver.elements[(By.ID, 'agree')]
+        with self.assertRaises(TimeoutException):
+            fill(self.page, {'name': 'John', 'agree': True}, timeout=.1)
+        self.assertEqual(self.name.value, '')
+
+    def test_wrong_names(self):
+        with self.assertRaises(TypeError):
+            self.page.fill(whatever='John')
+        with self.assertRaises(TypeError):
+            self.page.fill(title='John')
+
+
+class LazyElementListTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        self.rows = self.driver.add_elements(By.CSS_SELECTOR, 'tr', [True] * 5)
+
+        class TestPage(Page):
+            rows = ElementList('tr', FragmentObject, chunk_size=2)
+        self.page = TestPage()
+        self.list_objects = self.page.rows
+        del self.driver.commands[:]
+
+    def test_len_is_one_round_trip(self):
+        self.assertEqual(len(self.list_objects), 5)
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_indexing(self):
+        self.assertIs(self.list_objects[3].webelement, self.rows[3])
+        self.assertEqual(self.driver.commands, ['execute_script'])
+        self.assertIs(self.list_objects[-1].webelement, self.rows[4])
+        with self.assertRaises(IndexError):
+            self.list_objects[5]
+
+    def test_slicing(self):
+        self.assertEqual([row.webelement for row in self.list_objects[1:3]], self.rows[1:3])
+        self.assertEqual([row.webelement for row in self.list_objects[::2]], self.rows[::2])
+        self.assertEqual([row.webelement for row in self.list_objects[-2:]], self.rows[-2:])
+
+    def test_slicing_backwards(self):
+        for index in [slice(None, None, -1), slice(4, 1, -1), slice(-1, 0, -2),
+                      slice(1, 4, -1), slice(None, -3, -1)]:
+            self.assertEqual([row.webelement for row in self.list_objects[index]],
+                             self.rows[index])
+
+    def test_iteration_is_done_in_chunks(self):
+        self.assertEqual([row.webelement for row in self.list_objects], self.rows)
+        self.assertEqual(self.driver.commands, ['execute_script'] * 3)
+
+    def test_waits_for_elements(self):
+        class TestPage(Page):
+            rows = ElementList('li', FragmentObject, timeout=.1)
+        self.driver.on_wait = lambda: self.driver.add_elements(By.CSS_SELECTOR, 'li', [True])
+        self.assertEqual(len(TestPage().rows), 1)
+        self.driver.on_wait = None
+        del self.driver.elements[(By.CSS_SELECTOR, 'li')]
+        with self.assertRaises(TimeoutException):
+            TestPage().rows
+
+    def test_xpath_slices_without_scripts(self):
+        container = Mock(**{'find_elements.return_value': []})
+        get_elements_slice('xpath=//li', 10, 20, container=container)
+        container.find_elements.assert_called_once_with(
+            by=By.XPATH, value='(//li)[position() > 10 and position() <= 20]')
+
+
+class ColumnarReadsTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        self.rows = self.driver.add_elements(By.CSS_SELECTOR, 'tr', [True] * 5)
+        for i, row in enumerate(self.rows):
+            row.add_elements(By.CLASS_NAME, 'price', [True], text=str(i))
+            row.add_elements(By.NAME, 'qty', [True], value=str(i * 10))
+
+        class Row(FragmentObject):
+            price = ReadOnlyText('class=price')
+            qty = Text('name=qty')
+
+        class TestPage(Page):
+            rows = ElementList('tr', Row, chunk_size=2)
+        self.page = TestPage()
+
+    def test_column(self):
+        rows = self.page.rows
+        del self.driver.commands[:]
+        self.assertEqual(rows.column('class=price'), ['0', '1', '2', '3', '4'])
+        self.assertEqual(rows.column('name=qty', 'value'), ['0', '10', '20', '30', '40'])
+        # Three chunks of at most two rows per column.
+        self.assertEqual(self.driver.commands, ['execute_script'] * 6)
+
+    def test_values(self):
+        rows = self.page.rows
+        del self.driver.commands[:]
+        self.assertEqual(rows.values()[3], {'price': '3', 'qty': '30'})
+        self.assertEqual(self.driver.commands, ['execute_script'] * 3)
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        rows = self.page.rows
+        self.assertEqual(rows.column('class=price'), ['0', '1', '2', '3', '4'])
+        self.assertEqual(rows.values()[3], {'price': '3', 'qty': '30'})
+
+    def test_unknown_property(self):
+        with self.assertRaises(ValueError):
+            self.page.rows.column('class=price', 'innerHTML')
+
+
 class ElementTests(TestCase):
 
     def test_get_element(self):
@@ -116,6 +790,71 @@ class ElementSubclassesTests(TestCase):
         self.webelement.click.assert_called_once_with()
 
 
+class WebElementCacheTests(TestCase):
+
+    def setUp(self):
+        self.webelement = Mock()
+        self.driver = Mock(**{'find_elements.return_value': [self.webelement]})
+        set_driver(self.driver)
+
+        class TestFragmentObject(FragmentObject):
+            input = Text('css=.input')
+
+        class TestPage(Page):
+            cache_webelements = True
+            text = Text('whatever')
+            fragment = Fragment('id=fragment', TestFragmentObject)
+            link = Link('id=link')
+        self.TestPage = TestPage
+        self.page = TestPage(assert_is_on_page=False)
+
+    def test_cache_is_disabled_by_default(self):
+        class TestPage(Page):
+            text = Text('whatever')
+        page = TestPage(assert_is_on_page=False)
+        page.text = 'hello'
+        page.text
+        self.assertEqual(self.driver.find_elements.call_count, 2)
+
+    def test_element_is_located_once(self):
+        self.page.text = 'hello'
+        self.page.text
+        self.assertEqual(self.driver.find_elements.call_count, 1)
+
+    def test_fragments_share_the_page_cache(self):
+        self.webelement.find_elements.return_value = [Mock()]
+        self.page.fragment.input = 'hello'
+        self.page.fragment.input
+        self.assertEqual(self.driver.find_elements.call_count, 1)
+        self.assertEqual(self.webelement.find_elements.call_count, 1)
+
+    def test_stale_element_is_located_again(self):
+        self.page.text
+        self.webelement.get_attribute.side_effect = [
+            StaleElementReferenceException(), 'value']
+        self.assertEqual(self.page.text, 'value')
+        self.assertEqual(self.driver.find_elements.call_count, 2)
+
+    def test_stale_element_without_cache(self):
+        self.page.webelement_cache = None
+        self.webelement.get_attribute.side_effect = StaleElementReferenceException()
+        with self.assertRaises(StaleElementReferenceException):
+            self.page.text
+
+    def test_link_click_invalidates_cache(self):
+        self.page.text
+        self.page.link.click()
+        self.page.text
+        self.assertEqual(self.driver.find_elements.call_count, 3)
+
+    def test_load_invalidates_cache(self):
+        self.page.text
+        self.page.url = 'http://example.org/'
+        self.page.load()
+        self.page.text
+        self.assertEqual(self.driver.find_elements.call_count, 2)
+
+
 class LinkTests(TestCase):
 
     def setUp(self):
@@ -185,6 +924,8 @@ class FragmentTests(TestCase):
 
     def test_getting_fragment(self):
         fragment = self.page.fragment
+        self.assertFalse(self.mocked_driver.find_elements.called)
+        self.assertIs(fragment.webelement, self.container)
         self.mocked_driver.find_elements.assert_called_once_with(
             by=By.ID, value='fragment_id')
 
@@ -194,6 +935,119 @@ class FragmentTests(TestCase):
         self.element.send_keys.assert_called_once_with('lalala')
 
 
+class NestedFragmentTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        [self.outer] = self.driver.add_elements(By.ID, 'outer', [True])
+        [self.middle] = self.outer.add_elements(By.ID, 'middle', [True])
+        [self.inner] = self.middle.add_elements(By.ID, 'inner', [True])
+        self.inner.add_elements(By.NAME, 'leaf', [True], value='deep')
+        self.inner.add_elements(By.NAME, 'go', [True])
+
+        class Inner(FragmentObject):
+            leaf = Text('name=leaf')
+            go = Link('name=go')
+
+        class Middle(FragmentObject):
+            inner = Fragment('id=inner', Inner)
+
+        class Outer(FragmentObject):
+            middle = Fragment('id=middle', Middle)
+
+        class TestPage(Page):
+            outer = Fragment('id=outer', Outer)
+        self.Inner = Inner
+        self.TestPage = TestPage
+        self.page = TestPage()
+
+    def test_path_is_located_in_one_round_trip(self):
+        middle = self.page.outer.middle
+        self.assertEqual(self.driver.commands, [])
+        self.assertEqual(middle.inner.leaf, 'deep')
+        self.assertEqual(self.driver.commands, ['execute_script', 'get_attribute'])
+        self.assertIs(middle.webelement, self.middle)
+
+    def test_every_level_must_be_one_visible_element(self):
+        self.outer.add_elements(By.ID, 'middle', [True])
+        inner = self.page.outer.middle.inner
+        with self.assertRaises(TimeoutException):
+            self.Inner.__dict__['leaf'].get_webelement(inner, timeout=.1)
+
+    def test_path_is_waited_for_in_the_browser(self):
+        self.middle.elements.clear()
+        self.driver.on_wait = lambda: self.middle.elements.update(
+            {(By.ID, 'inner'): [self.inner]})
+        self.assertEqual(self.page.outer.middle.inner.leaf, 'deep')
+        self.assertEqual(self.driver.commands,
+                         ['execute_script', 'execute_async_script', 'get_attribute'])
+
+    def test_fragment_webelement_is_located_lazily(self):
+        self.assertIs(self.page.outer.middle.inner.webelement, self.inner)
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.assertEqual(self.page.outer.middle.inner.leaf, 'deep')
+
+    def test_path_is_cached(self):
+        self.TestPage.cache_webelements = True
+        page = self.TestPage()
+        page.outer.middle.inner.leaf
+        del self.driver.commands[:]
+        self.assertEqual(page.outer.middle.inner.leaf, 'deep')
+        self.assertEqual(self.driver.commands, ['get_attribute'])
+
+    def rerender(self):
+        old = [self.outer, self.middle, self.inner] + sum(self.inner.elements.values(), [])
+        for element in old:
+            element.stale = True
+        [outer] = self.driver.add_elements(By.ID, 'outer', [True])
+        [middle] = outer.add_elements(By.ID, 'middle', [True])
+        [inner] = middle.add_elements(By.ID, 'inner', [True])
+        inner.add_elements(By.NAME, 'leaf', [True], value='new')
+        inner.add_elements(By.NAME, 'other', [True], value='other')
+        [self.new_go] = inner.add_elements(By.NAME, 'go', [True])
+        return outer
+
+    def test_stale_fragment_is_located_again(self):
+        self.TestPage.cache_webelements = True
+        page = self.TestPage()
+        page.outer.middle.inner.leaf
+        self.rerender()
+        self.assertEqual(page.outer.middle.inner.leaf, 'new')
+        del self.driver.commands[:]
+        self.assertEqual(page.outer.middle.inner.leaf, 'new')
+        self.assertEqual(self.driver.commands, ['get_attribute'])
+
+    def test_stale_links_are_located_again(self):
+        self.TestPage.cache_webelements = True
+        page = self.TestPage()
+        page.outer.middle.inner.go.click()
+        link = page.outer.middle.inner.go
+        self.rerender()
+        page.outer.middle.inner.go.click()
+        link.click()
+        self.assertFalse(self.new_go.checked)  # Clicked twice.
+
+    def test_stale_fragments_are_clicked_after_locating_them_again(self):
+        self.TestPage.cache_webelements = True
+        page = self.TestPage()
+        page.outer.click()
+        outer = self.rerender()
+        page.outer.click()
+        self.assertTrue(outer.checked)
+
+    def test_lookup_in_stale_fragment_is_retried(self):
+        self.Inner.other = Text('name=other')
+        self.TestPage.cache_webelements = True
+        page = self.TestPage()
+        page.outer.middle.inner.leaf
+        self.rerender()
+        self.assertEqual(page.outer.middle.inner.other, 'other')
+
+
 class PageTests(TestCase):
 
     def setUp(self):
@@ -256,6 +1110,41 @@ class PageTests(TestCase):
         self.assertEqual(Page._clean_url('/some/path?lala=1'), '/some/path')
 
 
+class URLWaitingTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+
+        class TestPage(Page):
+            url = 'http://example.org/{slug}/'
+        self.TestPage = TestPage
+
+    def navigate(self):
+        self.driver.url = 'http://example.org/CRS1/?q=1'
+
+    def test_waiting_is_done_in_the_browser(self):
+        self.driver.on_wait = self.navigate
+        page = self.TestPage(assert_is_on_page=True)
+        self.assertEqual(page.params, {'slug': 'CRS1'})
+        self.assertEqual(self.driver.commands,
+                         ['current_url', 'execute_async_script', 'current_url'])
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutException):
+            self.TestPage(assert_is_on_page=True, timeout=.1)
+
+    def test_polling_without_scripts(self):
+        self.driver.scripts_enabled = False
+        with self.assertRaises(TimeoutException):
+            self.TestPage(assert_is_on_page=True, timeout=.3)
+        self.assertEqual(self.driver.commands.count('execute_async_script'), 1)
+        self.assertGreater(self.driver.commands.count('current_url'), 2)
+
+    def test_url_regex_is_compiled_once(self):
+        self.assertIs(self.TestPage._url_regex(), self.TestPage._url_regex())
+
+
 class PageParametersTests(TestCase):
 
     def setUp(self):
@@ -302,3 +1191,973 @@ class PageParametersTests(TestCase):
         page = TestPage(assert_is_on_page=True, timeout=.1)
 
         self.assertEqual(page.params['whatever'], 'aaaaa')
+
+
+class DriverScopingTests(TestCase):
+
+    def setUp(self):
+        self.default_driver = Mock()
+        set_driver(self.default_driver)
+
+    def test_use_driver(self):
+        driver = Mock()
+        with use_driver(driver):
+            self.assertIs(get_driver(), driver)
+            self.assertIs(Page().driver, driver)
+        self.assertIs(get_driver(), self.default_driver)
+
+    def test_drivers_are_bound_per_thread(self):
+        drivers = {}
+        ready = threading.Event()
+
+        def run():
+            with use_driver(Mock()) as driver:
+                drivers['thread'] = get_driver()
+                ready.wait()
+        thread = threading.Thread(target=run)
+        thread.start()
+        ready.set()
+        thread.join()
+        self.assertIsNot(drivers['thread'], self.default_driver)
+        self.assertIs(get_driver(), self.default_driver)
+
+
+class DriverPoolTests(TestCase):
+
+    def setUp(self):
+        self.pool = DriverPool(Mock, max_size=2)
+
+    def test_drivers_are_reused_and_reset(self):
+        with self.pool.lease() as driver:
+            self.assertIs(get_driver(), driver)
+        driver.delete_all_cookies.assert_called_once_with()
+        driver.get.assert_called_once_with('about:blank')
+        with self.pool.lease() as same_driver:
+            self.assertIs(same_driver, driver)
+
+    def test_prewarm(self):
+        factory = Mock()
+        pool = DriverPool(factory, max_size=3)
+        pool.prewarm()
+        self.assertEqual(factory.call_count, 3)
+        with pool.lease():
+            pass
+        self.assertEqual(factory.call_count, 3)
+
+    def test_size_is_capped(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(WebDriverException):
+            self.pool.acquire(timeout=.1)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(timeout=.1), first)
+
+    def test_broken_drivers_are_dropped(self):
+        with self.pool.lease() as driver:
+            driver.delete_all_cookies.side_effect = WebDriverException()
+        driver.quit.assert_called_once_with()
+        with self.pool.lease() as new_driver:
+            self.assertIsNot(new_driver, driver)
+
+    def test_waiter_gets_slot_of_broken_driver(self):
+        pool = DriverPool(Mock, max_size=1, reset=Mock(side_effect=WebDriverException()))
+        driver = pool.acquire()
+        timer = threading.Timer(.1, pool.release, [driver])
+        timer.start()
+        start = time.time()
+        new_driver = pool.acquire(timeout=5)
+        timer.join()
+        self.assertIsNot(new_driver, driver)
+        self.assertLess(time.time() - start, 1)
+
+    def test_close(self):
+        with self.pool.lease() as driver:
+            self.pool.close()
+        driver.quit.assert_called_once_with()
+
+
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        self.driver.add_elements(By.ID, 'name', [True], value='John')
+        self.driver.add_elements(By.ID, 'title', [True], text='Profile')
+
+        class TestPage(Page):
+            name = Text('id=name')
+            title = ReadOnlyText('id=title')
+        self.page = TestPage()
+        self.recorder = Recorder()
+
+    def test_commands_are_counted_per_locator_and_page(self):
+        with self.recorder.record(self.driver):
+            self.page.name
+            self.page.name
+            self.page.title
+        name = self.recorder.locators['id=name']
+        self.assertEqual((name.accesses, name.commands), (2, 4))
+        self.assertEqual(self.recorder.locators['id=title'].commands, 2)
+        self.assertEqual(self.recorder.pages['TestPage'].commands, 6)
+        self.assertEqual(self.recorder.commands['execute_script'], 3)
+
+    def test_waits_are_counted(self):
+        self.driver.on_wait = lambda: self.driver.add_elements(By.ID, 'late', [True])
+
+        class TestPage(Page):
+            late = ReadOnlyText('id=late')
+        with self.recorder.record(self.driver):
+            TestPage().late
+        self.assertEqual(self.recorder.locators['id=late'].wait_iterations, 2)
+
+    def test_nothing_is_recorded_when_disabled(self):
+        with self.recorder.record(self.driver):
+            pass
+        self.page.name
+        self.assertEqual(self.recorder.as_dict()['commands'], {})
+
+    def test_export(self):
+        with self.recorder.record(self.driver):
+            self.page.name
+        data = json.loads(self.recorder.to_json())
+        self.assertEqual(data['locators']['id=name']['commands'], 2)
+        self.assertEqual(self.recorder.slowest(1)[0][0], 'id=name')
+        self.assertIn('id=name', self.recorder.report())
+
+
+FROZEN_HTML = """<html><body>
+<input name="q" value="typed">
+<input type="checkbox" id="agree" checked>
+<h1 id="title">Hello <span>world</span><span %s>!</span></h1>
+<ul><li class="item">a</li><li class="item">b</li><li class="item" %s>c</li></ul>
+<div id="box"><input name="inner" value="x"></div>
+</body></html>"""
+
+
+class FrozenPageTests(TestCase):
+
+    def setUp(self):
+        class BoxFragment(FragmentObject):
+            inner = Text('name=inner')
+
+        class TestPage(Page):
+            q = Text('name=q')
+            agree = Checkbox('id=agree')
+            title = ReadOnlyText('id=title')
+            items = ElementList('li.item', FragmentObject)
+            box = Fragment('id=box', BoxFragment)
+            missing = ReadOnlyText('id=missing')
+        self.TestPage = TestPage
+
+    def make_driver(self, **kwargs):
+        driver = Mock(**kwargs)
+        set_driver(driver)
+        return driver
+
+    def test_reads_are_local(self):
+        html = FROZEN_HTML % ('data-webel-hidden', 'data-webel-hidden')
+        driver = self.make_driver(**{'execute_script.return_value': {
+            'html': html, 'url': 'http://example.org/'}})
+        page = self.TestPage()
+        with page.frozen():
+            self.assertEqual(page.q, 'typed')
+            self.assertIs(page.agree, True)
+            self.assertEqual(page.title, 'Hello world')
+            self.assertEqual(len(page.items), 3)
+            self.assertEqual([item.webelement.text for item in page.items], ['a', 'b', ''])
+            self.assertEqual(page.box.inner, 'x')
+            self.assertEqual(take_snapshot(page.box), {'inner': 'x'})
+        self.assertEqual(len(driver.method_calls), 1)
+        self.assertIs(page.driver, driver)
+
+    def test_missing_elements_fail_at_once(self):
+        self.make_driver(**{'execute_script.return_value': {
+            'html': FROZEN_HTML % ('', ''), 'url': 'http://example.org/'}})
+        page = self.TestPage()
+        start = time.time()
+        with page.frozen():
+            with self.assertRaises(TimeoutException):
+                page.missing
+        self.assertLess(time.time() - start, 1)
+
+    def test_writes_are_rejected(self):
+        self.make_driver(**{'execute_script.return_value': {
+            'html': FROZEN_HTML % ('', ''), 'url': 'http://example.org/'}})
+        page = self.TestPage()
+        with page.frozen():
+            with self.assertRaises(FrozenPageException):
+                page.q = 'new'
+
+    def test_text_breaks_lines_like_live_reads(self):
+        # What selenium's `WebElement.text` gives for the same markup.
+        live = [
+            ('<div>Line one<br>Line two<p>Para</p></div>', 'Line one\nLine two\nPara'),
+            ('<div>  a\n  <b>b</b> </div><div>c</div>', 'a b\nc'),
+            ('<div><ul><li>x</li><li> y </li></ul>tail</div>', 'x\ny\ntail'),
+            ('<div>a<br><br>b</div>', 'a\n\nb'),
+            ('<table><tr><td>1</td><td>2</td></tr><tr><td>3</td></tr></table>', '1 2\n3'),
+        ]
+        for html, text in live:
+            document = FrozenDocument('<html><body>%s</body></html>' % html)
+            [element] = document.find_elements(By.TAG_NAME, 'body')
+            self.assertEqual(element.text, text)
+
+    def test_page_source_fallback(self):
+        html = FROZEN_HTML % ('style="display: none"', 'hidden')
+        self.make_driver(**{'execute_script.side_effect': WebDriverException(),
+                            'page_source': html})
+        page = self.TestPage()
+        with page.frozen():
+            self.assertEqual(page.title, 'Hello world')
+            self.assertEqual([item.webelement.is_displayed() for item in page.items],
+                             [True, True, False])
+
+
+class ReplayTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.driver.add_elements(By.ID, 'name', [True], value='John')
+        self.driver.add_elements(By.ID, 'title', [True], text='Profile')
+        [box] = self.driver.add_elements(By.ID, 'box', [True])
+        box.add_elements(By.NAME, 'city', [True], value='Kyiv')
+        self.driver.add_elements(By.CSS_SELECTOR, 'li', [True, True], text='item')
+
+        class BoxFragment(FragmentObject):
+            city = Text('name=city')
+
+        class TestPage(Page):
+            name = Text('id=name')
+            title = ReadOnlyText('id=title')
+            box = Fragment('id=box', BoxFragment)
+            items = ElementList('li', FragmentObject)
+        self.TestPage = TestPage
+
+    def run_flow(self, driver):
+        with use_driver(driver):
+            page = self.TestPage()
+            page.name = 'Jane'
+            return [page.name, page.title, page.box.city, len(page.items),
+                    page.snapshot(), page.items[1].webelement.text]
+
+    def record(self):
+        recording = Recording(self.driver)
+        return recording, self.run_flow(recording.driver)
+
+    def test_replay(self):
+        recording, expected = self.record()
+        self.assertEqual(expected[0], 'Jane')
+        replay = Replay(recording.entries)
+        self.assertEqual(self.run_flow(replay.driver), expected)
+        replay.assert_finished()
+
+    def test_save_and_load(self):
+        recording, expected = self.record()
+        with tempfile.NamedTemporaryFile(suffix='.log') as f:
+            recording.save(f.name)
+            log = open(f.name).read()
+            replay = Replay.load(f.name)
+        self.assertEqual(log.count('\n'), len(recording.entries))
+        self.assertNotIn('var webel', log)
+        self.assertEqual(self.run_flow(replay.driver), expected)
+
+    def test_divergence(self):
+        recording, expected = self.record()
+        replay = Replay(recording.entries)
+        with use_driver(replay.driver):
+            page = self.TestPage()
+            with self.assertRaises(ReplayDivergence):
+                page.title
+
+    def test_unfinished_replay(self):
+        recording, expected = self.record()
+        replay = Replay(recording.entries)
+        with use_driver(replay.driver):
+            self.TestPage().name = 'Jane'
+        with self.assertRaises(ReplayDivergence):
+            replay.assert_finished()
+
+    def test_attributes_not_used_when_recording_are_missing(self):
+        recording, expected = self.record()
+        replay = Replay(recording.entries)
+        self.assertIsNone(getattr(replay.driver, 'never_used', None))
+        self.assertFalse(hasattr(replay.driver, 'window_handles'))
+        self.assertEqual(self.run_flow(replay.driver), expected)
+
+    def test_replay_of_a_remote_driver(self):
+        executor = FakeWindowsExecutor()
+        executor.windows['w0']['title'] = 'Profile'
+
+        class TestPage(Page):
+            title = ReadOnlyText('id=title')
+        recording = Recording(RemoteWebDriver(executor, desired_capabilities={}))
+        with use_driver(recording.driver):
+            self.assertEqual(TestPage().title, 'Profile')
+        replay = Replay(recording.entries)
+        with use_driver(replay.driver):
+            self.assertEqual(TestPage().title, 'Profile')
+        replay.assert_finished()
+
+    def test_replay_of_fragments_and_rows_of_a_remote_driver(self):
+        class RemoteDriver(RemoteWebDriver):
+            pass
+        executor = FakeWindowsExecutor()
+        executor.windows['w0'].update({'box': '', 'city': 'Kyiv', 'row': ['a', 'b']})
+
+        class BoxFragment(FragmentObject):
+            city = ReadOnlyText('id=city')
+
+        class TestPage(Page):
+            box = Fragment('id=box', BoxFragment)
+            rows = ElementList('id=row', FragmentObject)
+
+        def run_flow(driver):
+            with use_driver(driver):
+                page = TestPage()
+                return [page.box.city, [row.webelement.text for row in page.rows]]
+        recording = Recording(RemoteDriver(executor, desired_capabilities={}))
+        expected = run_flow(recording.driver)
+        self.assertEqual(expected, ['Kyiv', ['a', 'b']])
+        replay = Replay(recording.entries)
+        self.assertEqual(run_flow(replay.driver), expected)
+        replay.assert_finished()
+
+    def test_timeouts_are_replayed_without_waiting(self):
+        class MissingPage(Page):
+            missing = ReadOnlyText('id=missing', timeout=1)
+        self.driver.scripts_enabled = False
+        recording = Recording(self.driver)
+        with use_driver(recording.driver):
+            with self.assertRaises(TimeoutException):
+                MissingPage().missing
+        replay = Replay(recording.entries)
+        start = time.time()
+        with replay.virtual_time(), use_driver(replay.driver):
+            with self.assertRaises(TimeoutException):
+                MissingPage().missing
+        self.assertLess(time.time() - start, .5)
+        replay.assert_finished()
+
+
+class WaitForTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.driver.url = 'http://example.org/items/42?tab=1'
+        set_driver(self.driver)
+
+        class Panel(FragmentObject):
+            status = ReadOnlyText('.status')
+
+        class TestPage(Page):
+            dashboard = ReadOnlyText('id=dashboard')
+            error = ReadOnlyText('id=error')
+            name = Text('id=name')
+            panel = Fragment('id=panel', Panel)
+        self.page = TestPage()
+
+    def test_any_of_returns_the_winner(self):
+        self.driver.add_elements(By.ID, 'error', [True])
+        self.assertEqual(self.page.wait_for(any_of=['dashboard', 'error']), 'error')
+        self.assertEqual(self.driver.commands, ['execute_async_script'])
+
+    def test_waits_for_changes(self):
+        self.driver.on_wait = lambda: self.driver.add_elements(By.ID, 'dashboard', [True])
+        condition = Visible('dashboard')
+        self.assertIs(self.page.wait_for(any_of=['error', condition]), condition)
+
+    def test_all_of(self):
+        [panel] = self.driver.add_elements(By.ID, 'panel', [True])
+        panel.add_elements(By.CSS_SELECTOR, '.status', [True], text='Saved')
+        self.driver.add_elements(By.ID, 'name', [False], value='John')
+        self.assertIsNone(self.page.wait_for(all_of=[
+            TextEquals('panel.status', 'Saved'), Present('name'),
+            URLMatches('http://example.org/items/{id}')]))
+        with self.assertRaises(TimeoutException):
+            self.page.wait_for(all_of=['panel.status', 'name'], timeout=.1)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(TimeoutException):
+            self.page.wait_for(any_of=['dashboard', 'error'], timeout=.2)
+        self.assertLess(time.time() - start, 1)
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        self.driver.add_elements(By.ID, 'name', [True], value='John')
+        threading.Timer(.1, self.driver.add_elements, (By.ID, 'error', [True])).start()
+        self.assertEqual(
+            self.page.wait_for(any_of=['dashboard', 'error'], all_of=[TextEquals('name', 'John')],
+                               timeout=2),
+            'error')
+
+    def test_unknown_names(self):
+        with self.assertRaises(TypeError):
+            self.page.wait_for(any_of=['nothing'])
+        with self.assertRaises(TypeError):
+            self.page.wait_for(any_of=['name.nothing'])
+
+
+class PrefetchTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        self.driver.add_elements(By.ID, 'go', [True])
+        self.driver.add_elements(By.ID, 'title', [True], text='Next')
+        [panel] = self.driver.add_elements(By.ID, 'panel', [True])
+        panel.add_elements(By.CSS_SELECTOR, '.name', [True], text='John')
+
+        class Panel(FragmentObject):
+            name = ReadOnlyText('.name')
+
+        class NextPage(Page):
+            url = 'http://example.org/next'
+            title = ReadOnlyText('id=title')
+            panel = Fragment('id=panel', Panel)
+            late = ReadOnlyText('id=late')
+
+        class StartPage(Page):
+            go = Link('id=go', to=NextPage, prefetch=True)
+            plain_go = Link('id=go', to=NextPage)
+        self.NextPage = NextPage
+        self.start = StartPage()
+        # The click doesn't navigate, the page is already there.
+        self.driver.url = 'http://example.org/next'
+
+    def test_link_prefetches_the_destination(self):
+        link = self.start.go
+        self.driver.commands = []
+        page = link()
+        self.assertEqual(self.driver.commands, ['click', 'current_url', 'execute_script'])
+        self.driver.commands = []
+        self.assertEqual(page.title, 'Next')
+        self.assertEqual(page.panel.name, 'John')
+        self.assertEqual(self.driver.commands, ['text', 'text'])
+
+    def test_prefetched_elements_are_used_once(self):
+        page = self.start.go()
+        page.title
+        self.driver.commands = []
+        self.assertEqual(page.title, 'Next')
+        self.assertEqual(self.driver.commands, ['execute_script', 'text'])
+        # The page doesn't cache webelements it looks up itself.
+        self.assertEqual(page.title, 'Next')
+        self.assertEqual(self.driver.commands, ['execute_script', 'text'] * 2)
+
+    def test_prefetch_fills_the_cache_of_caching_pages(self):
+        self.NextPage.cache_webelements = True
+        page = self.start.go()
+        page.title
+        self.driver.commands = []
+        self.assertEqual(page.title, 'Next')
+        self.assertEqual(self.driver.commands, ['text'])
+
+    def test_elements_missing_when_prefetching_are_looked_up(self):
+        page = self.start.go()
+        self.driver.add_elements(By.ID, 'late', [True], text='Late')
+        self.assertEqual(page.late, 'Late')
+
+    def test_opt_in(self):
+        self.assertIsNone(self.start.plain_go().webelement_cache)
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        page = self.start.go()
+        self.assertIsNone(page.webelement_cache)
+        self.assertEqual(page.panel.name, 'John')
+
+
+class WatchTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+        [self.status] = self.driver.add_elements(By.ID, 'status', [True], text='Idle')
+        [self.count] = self.driver.add_elements(By.ID, 'count', [True], value='0')
+        [panel] = self.driver.add_elements(By.ID, 'panel', [True])
+        panel.add_elements(By.CSS_SELECTOR, '.title', [True], text='Jobs')
+        for row in self.driver.add_elements(By.CSS_SELECTOR, 'li', [True, True]):
+            row.add_elements(By.CSS_SELECTOR, '.name', [True], text='job')
+
+        class Panel(FragmentObject):
+            title = ReadOnlyText('.title')
+
+        class Row(FragmentObject):
+            name = ReadOnlyText('.name')
+
+        class TestPage(Page):
+            status = ReadOnlyText('id=status')
+            count = Text('id=count')
+            error = ReadOnlyText('id=error')
+            panel = Fragment('id=panel', Panel)
+            jobs = ElementList('li', Row)
+            go = Link('id=go')
+        self.page = TestPage()
+
+    def test_first_yield_has_everything(self):
+        watching = self.page.watch(timeout=.1)
+        self.assertEqual(next(watching), {
+            'status': 'Idle', 'count': '0', 'error': None, 'panel': {'title': 'Jobs'},
+            'jobs': [{'name': 'job'}, {'name': 'job'}]})
+        self.assertEqual(self.driver.commands, ['execute_script'])
+
+    def test_yields_only_changes(self):
+        watching = self.page.watch(timeout=.1)
+        next(watching)
+        self.driver.commands = []
+
+        def change():
+            self.status.text_ = 'Running'
+            self.driver.add_elements(By.CSS_SELECTOR, 'li', [True])
+        self.driver.on_wait = change
+        self.assertEqual(next(watching), {'status': 'Running', 'jobs': [{'name': None}]})
+        self.assertEqual(self.driver.commands, ['execute_async_script'])
+        self.driver.on_wait = None
+        with self.assertRaises(StopIteration):
+            next(watching)
+
+    def test_fallback_without_scripts(self):
+        self.driver.scripts_enabled = False
+        watching = self.page.watch(timeout=1, poll=.01)
+        self.assertEqual(next(watching)['count'], '0')
+        self.count.value = '1'
+        self.status.displayed = False
+        self.assertEqual(next(watching), {'count': '1', 'status': None})
+
+    def test_nothing_to_watch(self):
+        class EmptyPage(Page):
+            go = Link('id=go')
+        with self.assertRaises(TypeError):
+            next(EmptyPage().watch())
+
+
+class RouterTests(TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+        set_driver(self.driver)
+
+        class Home(Page):
+            url = 'http://router.test/'
+
+        class Item(Page):
+            url = 'http://router.test/items/{id}'
+
+        class ItemEdit(Page):
+            url = 'http://router.test/items/{id}/edit'
+
+        class NewItem(Page):
+            url = 'http://router.test/items/new'
+
+        class Course(Page):
+            url = 'http://router.test/courses/#/course/{code}'
+        self.pages = dict((cls.__name__, cls) for cls in [Home, Item, ItemEdit, NewItem, Course])
+
+    def tearDown(self):
+        for cls in self.pages.values():
+            router.remove(cls)
+
+    def resolve(self, url, base=Page):
+        self.driver.url = url
+        del self.driver.commands[:]
+        page = base.resolve_current()
+        self.assertEqual(self.driver.commands, ['current_url'])
+        return page
+
+    def test_literal_url(self):
+        page = self.resolve('http://router.test/?next=/items/')
+        self.assertIs(type(page), self.pages['Home'])
+
+    def test_templated_url(self):
+        page = self.resolve('http://router.test/items/42/edit')
+        self.assertIs(type(page), self.pages['ItemEdit'])
+        self.assertEqual(page.params, {'id': '42'})
+        self.assertEqual(page.url, 'http://router.test/items/42/edit')
+
+    def test_literal_segments_win(self):
+        self.assertIs(type(self.resolve('http://router.test/items/new')), self.pages['NewItem'])
+        self.assertIs(type(self.resolve('http://router.test/items/old')), self.pages['Item'])
+
+    def test_fragment_url(self):
+        page = self.resolve('http://router.test/courses/#/course/CRS-1')
+        self.assertIs(type(page), self.pages['Course'])
+        self.assertEqual(page.params, {'code': 'CRS-1'})
+
+    def test_unknown_url(self):
+        self.assertIsNone(self.resolve('http://router.test/items/42/delete'))
+        self.assertIsNone(self.resolve('http://router.test/items/a.b'))
+
+    def test_resolving_among_subclasses(self):
+        self.assertIsNone(self.resolve('http://router.test/', base=self.pages['Item']))
+
+    def test_reassigned_url(self):
+        self.pages['Home'].url = 'http://router.test/home'
+        self.assertIsNone(self.resolve('http://router.test/'))
+        self.assertIs(type(self.resolve('http://router.test/home')), self.pages['Home'])
+
+
+class SessionManagerTests(TestCase):
+
+    def setUp(self):
+        self.server = FakeWebDriverServer()
+        self.addCleanup(self.server.stop)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.state_path = os.path.join(directory, 'session.json')
+
+    def manager(self):
+        return SessionManager(self.state_path, self.server.url, {'browserName': 'fake'})
+
+    def test_session_is_reused(self):
+        driver = self.manager().connect()
+        driver.get('http://example.org/')
+        manager = self.manager()
+        attached = manager.connect()
+        self.assertTrue(manager.reattached)
+        self.assertEqual(attached.session_id, driver.session_id)
+        self.assertEqual(self.server.created, 1)
+        # Reset when reattached.
+        self.assertEqual(attached.current_url, 'about:blank')
+
+    def test_dead_session_is_replaced(self):
+        self.manager().connect()
+        self.server.sessions.clear()
+        manager = self.manager()
+        driver = manager.connect()
+        self.assertFalse(manager.reattached)
+        self.assertEqual(self.server.created, 2)
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)['session_id'], driver.session_id)
+
+    def test_quit(self):
+        manager = self.manager()
+        manager.connect()
+        manager.quit()
+        self.assertEqual(self.server.sessions, {})
+        self.assertFalse(os.path.exists(self.state_path))
+        manager.quit()
+
+
+class SlowFakeDriver(FakeDriver):
+
+    def execute(self, command, params=None):
+        super(SlowFakeDriver, self).execute(command, params)
+        time.sleep(.1)
+
+
+class ExecutorTests(TestCase):
+
+    def setUp(self):
+        self.executor = Executor(max_workers=10)
+        self.addCleanup(self.executor.close)
+
+        class Address(FragmentObject):
+            city = Text('name=city')
+
+        class TestPage(Page):
+            name = Text('id=name')
+            address = Fragment('id=address', Address)
+        self.TestPage = TestPage
+
+    def make_page(self, driver_cls=FakeDriver, name='John'):
+        driver = driver_cls()
+        driver.add_elements(By.ID, 'name', [True], value=name)
+        [address] = driver.add_elements(By.ID, 'address', [True])
+        address.add_elements(By.NAME, 'city', [True], value='Kyiv')
+        with use_driver(driver):
+            return self.TestPage()
+
+    def test_pages_of_different_drivers(self):
+        pages = [self.make_page(name='user%d' % i) for i in range(5)]
+        futures = [self.executor.wrap(page).get('name') for page in pages]
+        self.assertEqual(gather(futures), ['user%d' % i for i in range(5)])
+
+    def test_calls_overlap(self):
+        page = self.executor.wrap(self.make_page(SlowFakeDriver))
+        start = time.time()
+        futures = [page.get('address.city') for _ in range(5)] + [page.get('name')]
+        self.assertEqual(gather(futures), ['Kyiv'] * 5 + ['John'])
+        self.assertLess(time.time() - start, .5)
+
+    def test_writes_and_driver_binding(self):
+        page = self.make_page()
+        concurrent = self.executor.wrap(page)
+        concurrent.set('address.city', 'Lviv').result()
+        self.assertEqual(page.address.city, 'Lviv')
+        future = concurrent.call(lambda page: get_driver())
+        self.assertIs(future.result(), page.driver)
+
+    def test_exceptions_are_raised_by_result(self):
+        page = self.executor.wrap(self.make_page())
+        future = page.call(lambda page: page.nothing)
+        with self.assertRaises(AttributeError):
+            future.result()
+        self.assertTrue(future.done())
+
+    def test_pooled_connection(self):
+        from selenium.webdriver.remote.webdriver import WebDriver
+        server = FakeWebDriverServer()
+        self.addCleanup(server.stop)
+        driver = WebDriver(PooledConnection(server.url, maxsize=4), {'browserName': 'fake'})
+        futures = [self.executor.submit(driver, lambda: get_driver().current_url)
+                   for _ in range(8)]
+        self.assertEqual(gather(futures), ['about:blank'] * 8)
+
+
+RUNNER_SAMPLE = """
+import os
+from unittest import TestCase, SkipTest, expectedFailure
+
+from webel.driver import get_driver
+from webel.tests import FakeDriver
+
+
+class QuittingDriver(FakeDriver):
+
+    def quit(self):
+        pass
+
+
+class SampleTests(TestCase):
+
+    def test_uses_the_worker_driver(self):
+        self.assertIsInstance(get_driver(), QuittingDriver)
+        get_driver().execute('get')
+        get_driver().execute('get')
+
+    def test_fails(self):
+        self.fail('As expected.')
+
+    def test_first_process(self):
+        self.skipTest(str(os.getpid()))
+
+    def test_second_process(self):
+        self.skipTest(str(os.getpid()))
+
+
+class FixtureTests(TestCase):
+
+    set_up = 0
+
+    @classmethod
+    def setUpClass(cls):
+        FixtureTests.set_up += 1
+
+    def test_first(self):
+        self.assertEqual(self.set_up, 1)
+
+    def test_second(self):
+        self.assertEqual(self.set_up, 1)
+
+    @expectedFailure
+    def test_expected_failure(self):
+        self.fail()
+
+    @expectedFailure
+    def test_unexpected_success(self):
+        pass
+
+
+class BrokenFixtureTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        raise ValueError('No fixture.')
+
+    def test_not_run(self):
+        pass
+
+
+class OtherBrokenFixtureTests(BrokenFixtureTests):
+
+    @classmethod
+    def setUpClass(cls):
+        raise ValueError('No other fixture.')
+
+
+class SkippedFixtureTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        raise SkipTest('Not today.')
+
+    def test_skipped(self):
+        pass
+"""
+
+
+class RunnerTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.history = History(os.path.join(directory, 'history.json'))
+        self.module = 'runner_sample_%s' % uuid.uuid4().hex
+        with open(os.path.join(directory, self.module + '.py'), 'w') as f:
+            f.write(RUNNER_SAMPLE)
+        sys.path.insert(0, directory)
+        self.addCleanup(sys.path.remove, directory)
+
+    def test_shards_are_balanced(self):
+        self.history.tests = dict(
+            (name, {'seconds': seconds, 'commands': 0})
+            for name, seconds in zip('abcdef', [2, 5, 3, 4, 3, 3]))
+        shards = shard(list('abcdefg'), self.history, 2)
+        # 'g' is unknown, so it's expected to take the average.
+        self.assertEqual(sorted(shards), [['a', 'd', 'e', 'g'], ['b', 'c', 'f']])
+        self.assertEqual(shard(['a'], self.history, 4), [['a']])
+
+    def test_run(self):
+        test_ids = collect([self.module + '.SampleTests'])
+        prefix = self.module + '.SampleTests.'
+        self.history.tests = {prefix + 'test_first_process': {'seconds': 5, 'commands': 0},
+                              prefix + 'test_second_process': {'seconds': 5, 'commands': 0}}
+        results = run(test_ids, 2, self.module + ':QuittingDriver', self.history)
+        self.assertEqual([result['id'] for result in results], test_ids)
+        results = dict((result['id'][len(prefix):], result) for result in results)
+        self.assertEqual(results['test_uses_the_worker_driver']['status'], 'ok')
+        self.assertEqual(results['test_uses_the_worker_driver']['commands'], 2)
+        self.assertEqual(results['test_fails']['status'], 'failure')
+        self.assertIn('As expected.', results['test_fails']['details'])
+        self.assertNotEqual(results['test_first_process']['details'],
+                            results['test_second_process']['details'])
+
+        history = History(self.history.path)
+        self.assertEqual(set(history.tests), set(test_ids))
+        self.assertEqual(history.tests[prefix + 'test_uses_the_worker_driver']['commands'], 2)
+
+    def test_shard_shares_fixtures(self):
+        test_ids = collect([self.module + '.FixtureTests'])
+        results = dict((result['id'].split('.')[-1], result['status'])
+                       for result in run(test_ids, 1))
+        self.assertEqual(results, {
+            'test_first': 'ok', 'test_second': 'ok',
+            'test_expected_failure': 'expected failure',
+            'test_unexpected_success': 'unexpected success'})
+
+    def test_fixture_results_go_to_their_own_tests(self):
+        test_ids = collect([self.module + '.' + name for name in [
+            'BrokenFixtureTests', 'OtherBrokenFixtureTests', 'SkippedFixtureTests']])
+        results = dict((result['id'].split('.')[-2], result) for result in run(test_ids, 1))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results['BrokenFixtureTests']['status'], 'error')
+        self.assertIn('No fixture.', results['BrokenFixtureTests']['details'])
+        self.assertNotIn('other', results['BrokenFixtureTests']['details'])
+        self.assertIn('No other fixture.', results['OtherBrokenFixtureTests']['details'])
+        self.assertEqual(results['SkippedFixtureTests']['status'], 'skipped')
+        self.assertEqual(results['SkippedFixtureTests']['details'], 'Not today.')
+
+
+class TabsTests(TestCase):
+
+    def setUp(self):
+        self.executor = FakeWindowsExecutor()
+        self.tabs = Tabs(RemoteWebDriver(self.executor, desired_capabilities={}))
+        self.first, self.second = self.tabs.tab(), self.tabs.open()
+        self.executor.windows['w0']['title'] = 'First'
+        self.executor.windows['w1']['title'] = 'Second'
+
+        class TestPage(Page):
+            title = ReadOnlyText('id=title')
+        self.TestPage = TestPage
+
+    def page(self, tab):
+        with use_driver(tab):
+            return self.TestPage()
+
+    def test_pages_stay_in_their_tabs(self):
+        first, second = self.page(self.first), self.page(self.second)
+        self.assertEqual(second.title, 'Second')
+        self.assertEqual(second.title, 'Second')
+        self.assertEqual(first.title, 'First')
+        self.assertEqual(self.tabs.switches, 2)
+
+    def test_webelements_remember_their_tab(self):
+        with use_driver(self.first):
+            webelement = get_element('id=title')
+        self.assertEqual(self.page(self.second).title, 'Second')
+        self.assertEqual(webelement.text, 'First')
+
+    def test_scripts_run_in_the_tab_of_their_webelements(self):
+        with use_driver(self.first):
+            webelement = get_element('id=title')
+        self.assertEqual(self.page(self.second).title, 'Second')
+        self.assertEqual(
+            self.tabs.driver.execute_script(FakeWindowsExecutor.TEXT_SCRIPT, [webelement]),
+            ['First'])
+
+    def test_rows_remember_their_tab_without_tabs_keeping_them(self):
+        self.executor.windows['w0']['row'] = ['a', 'b']
+
+        class ListPage(Page):
+            rows = ElementList('id=row', FragmentObject)
+        with use_driver(self.first):
+            rows = list(ListPage().rows)
+        self.assertEqual(self.page(self.second).title, 'Second')
+        # Rows keep just element ids, yet their commands go to the first tab.
+        self.assertEqual([row.webelement.text for row in rows], ['a', 'b'])
+        webelement = weakref.ref(rows[0].webelement)
+        gc.collect()
+        self.assertIsNone(webelement())
+        # Only a webelement class per window is kept.
+        self.assertEqual(sorted(self.tabs._element_classes), ['w0', 'w1'])
+
+    def test_run_groups_steps_by_tab(self):
+        seen = []
+
+        def flow():
+            page = self.TestPage()
+            for i in range(3):
+                seen.append(page.title)
+                yield
+        self.tabs.run([(self.first, flow()), (self.second, flow()), (self.first, flow())])
+        self.assertEqual(sorted(seen), ['First'] * 6 + ['Second'] * 3)
+        # Once a round, instead of twice with the steps in the given order.
+        self.assertEqual(self.tabs.switches, 3)
+
+    def test_close(self):
+        first = self.page(self.first)
+        self.second.close()
+        self.assertEqual(sorted(self.executor.windows), ['w0'])
+        self.assertIsNone(self.tabs.current)
+        self.assertEqual(first.title, 'First')
+
+
+class CompactObjectsTests(TestCase):
+
+    def setUp(self):
+        self.executor = FakeWindowsExecutor()
+        self.executor.windows['w0']['row'] = ['a', 'b', 'c']
+        self.executor.windows['w0']['go'] = 'Go'
+        self.driver = RemoteWebDriver(self.executor, desired_capabilities={})
+        set_driver(self.driver)
+
+        class Row(FragmentObject):
+            pass
+
+        class TestPage(Page):
+            rows = ElementList('id=row', Row)
+            go = Link('id=go')
+        self.page = TestPage()
+
+    def test_rows_keep_only_element_ids(self):
+        rows = list(self.page.rows)
+        self.assertEqual([row.webelement.text for row in rows], ['a', 'b', 'c'])
+        self.assertEqual(rows[0].webelement, self.driver.find_elements(By.ID, 'row')[0])
+        # Neither a `__dict__` nor a `WebElement` is kept.
+        referents = [type(referent) for referent in gc.get_referents(rows[0])]
+        self.assertNotIn(dict, referents)
+        self.assertNotIn(type(rows[0].webelement), referents)
+
+    def test_other_webelements_are_kept(self):
+        webelement = Mock()
+        self.assertIs(FragmentObject(webelement).webelement, webelement)
+
+    def test_attributes_can_still_be_set(self):
+        row = self.page.rows[0]
+        row.note = 'seen'
+        self.assertEqual(row.note, 'seen')
+
+    def test_link_objects_have_no_dict(self):
+        self.assertFalse(hasattr(self.page.go, '__dict__'))
@@ -1,7 +1,22 @@
+import re
+import time
+import weakref
+
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
 
+from webel import scripts
 from webel.driver import get_driver
-from webel.exceptions import NoSuchElementException, MultipleElementsSelectedException
+from webel.exceptions import (
+    NoSuchElementException, MultipleElementsSelectedException, WebDriverException,
+    TimeoutException, StaleElementReferenceException, NoSuchWindowException,
+    UnexpectedAlertPresentException, JavascriptException)
+from webel.instrumentation import record_wait
+
+
+# Longest single `execute_async_script` call while waiting, in seconds.  Drivers
+# time async scripts out after 30 seconds by default, so stay well below.
+ASYNC_WAIT_SLICE = 5
 
 
 str_to_strategy = {
@@ -15,25 +30,54 @@ str_to_strategy = {
 }
 
 
+_parsed_locators = {}
+
+
 def parse_locator(locator):
+    try:
+        return _parsed_locators[locator]
+    except KeyError:
+        pass
     if '=' not in locator:
-        return By.CSS_SELECTOR, locator
-    strategy, value = locator.split('=', 1)
-    if strategy not in str_to_strategy:
-        return By.CSS_SELECTOR, locator
-    return str_to_strategy[strategy], value
+        parsed = By.CSS_SELECTOR, locator
+    else:
+        strategy, value = locator.split('=', 1)
+        if strategy not in str_to_strategy:
+            parsed = By.CSS_SELECTOR, locator
+        else:
+            parsed = str_to_strategy[strategy], value
+    _parsed_locators[locator] = parsed
+    return parsed
+
+
+def compile_locator(locator):
+    """
+    Check that `locator` makes sense and return it parsed as `(By, value)`.
+
+    Catches what `parse_locator` would silently turn into a broken CSS selector:
+    empty values and misspelled strategies, like 'xpth=//div'.
+    """
+    if not isinstance(locator, basestring):
+        raise TypeError('Locator should be a string, not %r.' % (locator,))
+    strategy, value = parse_locator(locator)
+    if not value.strip():
+        raise ValueError('Empty locator: %r.' % locator)
+    prefix = re.match(r'^(\w+)=', locator)
+    if prefix and prefix.group(1) not in str_to_strategy:
+        raise ValueError('Unknown locator strategy in %r, expected one of: %s.' % (
+            locator, ', '.join(sorted(str_to_strategy))))
+    return strategy, value
 
 
 # TODO: s/\<element/webelement
 def get_element(locator, container=None, only_visible=True):
-    all_elements = get_elements(locator, container=container)
     if only_visible:
-        elements = [element for element in all_elements if element.is_displayed()]
+        elements = get_visible_elements(locator, container=container)
     else:
-        elements = all_elements
+        elements = get_elements(locator, container=container)
 
     if only_visible and not elements:
-        raise NoSuchElementException('%r does not become visible')
+        raise NoSuchElementException('%r does not become visible' % locator)
     elif not elements:
         raise NoSuchElementException('%r is not found' % locator)
     if len(elements) > 1:
@@ -48,3 +92,259 @@ def get_elements(locator, container=None):
         container = get_driver()
     strategy, value = parse_locator(locator)
     return container.find_elements(by=strategy, value=value)
+
+
+def get_visible_elements(locator, container=None):
+    """
+    Like `get_elements`, but returns only displayed elements.
+
+    Lookup and visibility filtering are done in a single `execute_script` call.
+    Drivers which can't run scripts get the old behaviour: `find_elements`
+    followed by `is_displayed()` on every match.
+    """
+    if container is None:
+        container = get_driver()
+    strategy, value = parse_locator(locator)
+    elements = run_script(container, scripts.FIND_VISIBLE_ELEMENTS, (strategy, value))
+    if elements is None:
+        elements = [element for element in get_elements(locator, container=container)
+                    if element.is_displayed()]
+    return elements
+
+
+def _get_present_elements(locator, container):
+    elements = get_elements(locator, container=container)
+    if not elements:
+        raise NoSuchElementException('%r is not found' % locator)
+    return elements
+
+
+def wait_for_element(locator, container=None, timeout=20):
+    """
+    Wait until `locator` resolves to exactly one visible element and return it.
+
+    See `wait_for` for how the waiting is done.
+    """
+    return wait_for(
+        locator, container, timeout, 'visible',
+        lambda container: get_element(locator, container),
+        message="Can't get %r element" % locator)
+
+
+def wait_for_elements(locator, container=None, timeout=10):
+    """Wait until `locator` matches at least one element and return all matches."""
+    return wait_for(
+        locator, container, timeout, 'present',
+        lambda container: _get_present_elements(locator, container),
+        message="Can't get %r elements" % locator)
+
+
+def wait_for_count(locator, container=None, timeout=10):
+    """Wait until `locator` matches at least one element and return their number."""
+    def count(container):
+        number = count_elements(locator, container)
+        if not number:
+            raise NoSuchElementException('%r is not found' % locator)
+        return number
+    return wait_for(
+        locator, container, timeout, 'count', count,
+        message="Can't get %r elements" % locator)
+
+
+def count_elements(locator, container=None):
+    """Return the number of elements matching `locator`, without fetching them."""
+    if container is None:
+        container = get_driver()
+    strategy, value = parse_locator(locator)
+    number = run_script(container, scripts.COUNT_ELEMENTS, (strategy, value),
+                        returns=(int, long))
+    if number is None:
+        number = len(get_elements(locator, container=container))
+    return number
+
+
+def get_elements_slice(locator, start, stop, container=None):
+    """
+    Return elements matching `locator` from `start` up to, but not including, `stop`.
+
+    Only the requested elements are sent over the wire.  Without scripts that
+    still holds for XPath locators, using `position()`; other locators fetch
+    all the matches and slice them.
+    """
+    if container is None:
+        container = get_driver()
+    strategy, value = parse_locator(locator)
+    elements = run_script(
+        container, scripts.FIND_ELEMENTS_SLICE, (strategy, value, start, stop))
+    if elements is None:
+        if strategy == By.XPATH:
+            return container.find_elements(
+                by=By.XPATH, value='(%s)[position() > %d and position() <= %d]' % (
+                    value, start, stop))
+        elements = get_elements(locator, container=container)[start:stop]
+    return elements
+
+
+def wait_for(locator, container, timeout, mode, get, message=''):
+    """
+    Return `get(container)` as soon as it stops raising `NoSuchElementException`.
+
+    After a failed first try a MutationObserver is installed in the browser
+    with `execute_async_script`, which reports back as soon as the locator
+    matches (`mode` is 'visible' for exactly one visible element, 'present'
+    for any, or 'count' for their number), so there is no polling over the
+    wire.  When async scripts are
+    not supported the rest of the timeout is spent polling with
+    `WebDriverWait`, which raises `TimeoutException` in the end.
+    """
+    if container is None:
+        container = get_driver()
+    try:
+        return get(container)
+    except (NoSuchElementException, MultipleElementsSelectedException):
+        # Frozen pages (see `webel.frozen`) never change, no point in waiting.
+        if getattr(container, 'frozen', False) is True:
+            raise TimeoutException(message)
+    strategy, value = parse_locator(locator)
+    # Only visibility needs the (large) atom shipped with the script.
+    script = (scripts.WAIT_FOR_ELEMENTS if mode == 'visible' else
+              scripts.WAIT_FOR_PRESENT_ELEMENTS)
+    started = time.time()
+    deadline = started + timeout
+    iterations = [1]
+    try:
+        while time.time() < deadline:
+            iterations[0] += 1
+            wait_slice = min(deadline - time.time(), ASYNC_WAIT_SLICE)
+            result = run_script(
+                container, script, (strategy, value, mode, int(wait_slice * 1000)),
+                returns=dict, asynchronous=True)
+            if result is None:
+                break
+            if result['found']:
+                return result['found'][0] if mode == 'visible' else result['found']
+
+        def poll(container):
+            iterations[0] += 1
+            return get(container)
+        return WebDriverWait(
+            container, max(deadline - time.time(), 0),
+            ignored_exceptions=(MultipleElementsSelectedException,),
+        ).until(poll, message=message)
+    finally:
+        record_wait(iterations[0], started)
+
+
+# Failures of synchronous scripts in a row, for no transient reason, after
+# which a driver is taken to be unable to run scripts.  One isn't enough:
+# chromedriver, for one, fails scripts now and then while a page is loading.
+SCRIPTLESS_AFTER = 3
+
+# Such failures in a row of every driver.
+_script_failures = weakref.WeakKeyDictionary()
+
+# Failures of a script which don't mean the driver can't run scripts (an
+# exception thrown by the script itself means it ran).
+_transient_errors = (StaleElementReferenceException, NoSuchWindowException,
+                     UnexpectedAlertPresentException, TimeoutException,
+                     JavascriptException)
+
+
+def run_script(container, script, args=(), returns=list, asynchronous=False):
+    """
+    Run `script` with `container` as `arguments[0]` and `args` after it.
+
+    `container` is either a driver (then `arguments[0]` is `null`) or a
+    webelement, in which case the script runs on its parent driver.  With
+    `asynchronous` the script is run by `execute_async_script`.  Returns `None`
+    when the driver can't execute scripts or the result isn't of the `returns`
+    type, so callers can fall back to plain WebDriver commands.  A driver
+    which failed to run `SCRIPTLESS_AFTER` synchronous scripts in a row isn't
+    asked again.
+    """
+    if hasattr(container, 'execute_script'):
+        driver, root = container, None
+    else:
+        driver, root = getattr(container, 'parent', None), container
+    failures = _get_script_failures(driver)
+    if failures >= SCRIPTLESS_AFTER:
+        return None
+    try:
+        if asynchronous:
+            result = driver.execute_async_script(script, root, *args)
+        else:
+            result = driver.execute_script(script, root, *args)
+    except (WebDriverException, AttributeError) as error:
+        if not asynchronous and not isinstance(error, _transient_errors):
+            _set_script_failures(driver, failures + 1)
+        return None
+    if failures and not asynchronous:
+        _set_script_failures(driver, 0)
+    if not isinstance(result, returns):
+        return None
+    return result
+
+
+def _get_script_failures(driver):
+    try:
+        return _script_failures.get(driver, 0)
+    except TypeError:
+        return 0  # Not weakly referenceable.
+
+
+def _set_script_failures(driver, failures):
+    try:
+        _script_failures[driver] = failures
+    except TypeError:
+        pass
+
+
+class WebElementCache(object):
+
+    """
+    Remembers webelements located by descriptors of a page and its fragments.
+
+    Webelements are keyed by the descriptor and the webelement of the container
+    they were looked up in, so fragments of the same page share one cache.
+    """
+
+    def __init__(self):
+        self._webelements = {}
+
+    def get(self, container, descriptor):
+        return self._webelements.get((container.webelement, descriptor))
+
+    def set(self, container, descriptor, webelement):
+        self._webelements[(container.webelement, descriptor)] = webelement
+
+    def forget(self, container, descriptor):
+        self._webelements.pop((container.webelement, descriptor), None)
+
+    def clear(self):
+        self._webelements.clear()
+
+
+class PrefetchedWebElements(WebElementCache):
+
+    """
+    Webelements located ahead of time, see `elements.prefetch`, for a container
+    which doesn't cache them: each is handed out once, and nothing else is
+    remembered, so later lookups go to the browser.
+    """
+
+    def __init__(self, cache):
+        super(PrefetchedWebElements, self).__init__()
+        self._webelements = dict(cache._webelements)
+
+    def get(self, container, descriptor):
+        return self._webelements.pop((container.webelement, descriptor), None)
+
+    def set(self, container, descriptor, webelement):
+        pass
+
+
+def get_webelement_cache(container):
+    cache = getattr(container, 'webelement_cache', None)
+    if isinstance(cache, WebElementCache):
+        return cache
+    return None